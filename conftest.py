@@ -0,0 +1,52 @@
+import pytest
+from django.core.signals import request_finished, request_started
+
+from core.queryshapes import QueryShapes, RepeatedQueriesError
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        'query_shape_limit',
+        'Сколько раз запрос одной формы может повториться за ответ; '
+        '0 отключает проверку',
+        default='0')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'allow_repeated_queries: не проверять повторяющиеся запросы')
+
+
+@pytest.fixture(autouse=True)
+def query_shapes(request):
+    """Роняет тест, если ответ тестового клиента повторяет запрос одной
+    формы больше query_shape_limit раз."""
+    limit = int(request.config.getini('query_shape_limit'))
+    if not limit or request.node.get_closest_marker(
+            'allow_repeated_queries'):
+        yield
+        return
+    watching = []
+
+    def started(**kwargs):
+        watching.append(QueryShapes(limit).start())
+
+    def finished(**kwargs):
+        if not watching:
+            return
+        shapes = watching.pop()
+        shapes.stop()
+        if shapes.repeated:
+            raise RepeatedQueriesError(
+                'Повторяющиеся запросы за один ответ:\n' + shapes.report())
+
+    request_started.connect(started)
+    request_finished.connect(finished)
+    try:
+        yield
+    finally:
+        request_started.disconnect(started)
+        request_finished.disconnect(finished)
+        while watching:
+            watching.pop().stop()
@@ -0,0 +1,289 @@
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.core.signals import request_started
+
+from . import metrics
+
+VERSION_KEY = 'two-tier:version:{}'
+LOCK_FILE = '.lock'
+_MISSING = object()
+_locals = {}
+
+
+def namespace(key):
+    """Семейство ключа — первые два сегмента через ':'.
+
+    'posts:card:12:...' и 'posts:card:13:...' — одно семейство. Ключи без
+    ':' (сессии, ключи Django) — одно общее семейство '', а не по версии
+    в L2 на каждый ключ.
+    """
+    if ':' not in key:
+        return ''
+    return ':'.join(key.split(':', 2)[:2])
+
+
+class _Local:
+    """L1 одного процесса: общий для всех потоков и экземпляров бэкенда."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.lock = threading.RLock()
+
+
+def _expire_checks(**kwargs):
+    for local in _locals.values():
+        with local.lock:
+            local.versions.clear()
+
+
+request_started.connect(_expire_checks, dispatch_uid='two_tier_cache')
+
+
+class TwoTierCache(BaseCache):
+    """Ограниченный LRU в памяти процесса поверх общего кэша.
+
+    Чтения обслуживает L1, промахи уходят в L2 — алиас OPTIONS['L2'] из
+    CACHES. У каждого семейства ключей (namespace()) в L2 лежит версия,
+    её меняют только перезапись, incr и удаление уже существующего
+    ключа: новый ключ ничьих L1 не затрагивает. Запись L1 помнит
+    версию, при которой прочитана; версия семейства сверяется с L2 при
+    первом обращении в запросе и не реже раза в CHECK_INTERVAL секунд,
+    при расхождении запись L1 отбрасывается.
+
+    Как и LocMemCache, L1 хранит значения в pickle и отдаёт каждому
+    вызову свою копию: изменённый после get() объект не попадает ни к
+    другим потокам, ни в следующий get().
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self._max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = options.get('L1_TIMEOUT', 60)
+        self._check_interval = options.get('CHECK_INTERVAL', 1)
+        self._local = _locals.setdefault(location, _Local())
+
+    @property
+    def _l2(self):
+        return caches[self._l2_alias]
+
+    def _version(self, version):
+        return self.version if version is None else version
+
+    def _current(self, family):
+        """Версия семейства, сверенная с L2 в этом запросе."""
+        local = self._local
+        now = time.monotonic()
+        with local.lock:
+            known = local.versions.get(family)
+        if known is not None and now - known[1] < self._check_interval:
+            return known[0]
+        key = VERSION_KEY.format(family)
+        current = self._l2.get(key)
+        if current is None:
+            # Версии нет после clear() или вытеснения: заводим новую,
+            # чтобы старые записи L1 других процессов не совпали с ней.
+            self._l2.add(key, uuid.uuid4().hex, None)
+            current = self._l2.get(key)
+        with local.lock:
+            local.versions[family] = (current, now)
+        return current
+
+    def _bump(self, family):
+        current = uuid.uuid4().hex
+        self._l2.set(VERSION_KEY.format(family), current, None)
+        with self._local.lock:
+            self._local.versions[family] = (current, time.monotonic())
+        return current
+
+    def _remember(self, key, family, current, value,
+                  timeout=DEFAULT_TIMEOUT):
+        """Кладёт в L1 значение, прочитанное или записанное при версии
+        семейства current."""
+        lifetime = self._l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            lifetime = min(lifetime, timeout)
+        local = self._local
+        with local.lock:
+            local.entries.pop(key, None)
+            if lifetime <= 0:
+                return
+            local.entries[key] = (
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                time.monotonic() + lifetime, current)
+            while len(local.entries) > self._max_entries:
+                local.entries.popitem(last=False)
+
+    def _forget(self, key):
+        with self._local.lock:
+            self._local.entries.pop(key, None)
+
+    def _lookup(self, key, family):
+        local = self._local
+        with local.lock:
+            entry = local.entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= time.monotonic():
+                del local.entries[key]
+                return _MISSING
+        if entry[2] != self._current(family):
+            self._forget(key)
+            return _MISSING
+        with local.lock:
+            if key in local.entries:
+                local.entries.move_to_end(key)
+        return pickle.loads(entry[0])
+
+    def _l1_key(self, key, version):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        return l1_key
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        family = namespace(key)
+        value = self._lookup(l1_key, family)
+        if value is not _MISSING:
+            metrics.count_cache(1)
+            return value
+        current = self._current(family)
+        value = self._l2.get(key, _MISSING, version=self._version(version))
+        if value is _MISSING:
+            metrics.count_cache(0, 1)
+            return default
+        metrics.count_cache(1)
+        self._remember(l1_key, family, current, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self._lookup(self._l1_key(key, version), namespace(key))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            # Версии читаются до значений: запись между ними даст
+            # лишний промах, а не устаревшее значение в L1.
+            versions = {family: self._current(family)
+                        for family in set(map(namespace, missing))}
+            fetched = self._l2.get_many(
+                missing, version=self._version(version))
+            for key, value in fetched.items():
+                family = namespace(key)
+                self._remember(self._l1_key(key, version), family,
+                               versions[family], value)
+            found.update(fetched)
+        metrics.count_cache(len(found), len(keys) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        family = namespace(key)
+        # Новый ключ не может лежать в чужих L1, версию менять незачем.
+        current = self._current(family)
+        existed = self._l2.has_key(key, version=self._version(version))
+        self._l2.set(key, value, timeout, version=self._version(version))
+        if existed:
+            current = self._bump(family)
+        self._remember(self._l1_key(key, version), family, current,
+                       value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        family = namespace(key)
+        current = self._current(family)
+        added = self._l2.add(key, value, timeout,
+                             version=self._version(version))
+        if added:
+            self._remember(self._l1_key(key, version), family, current,
+                           value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        versions = {family: self._current(family)
+                    for family in set(map(namespace, data))}
+        overwritten = {namespace(key) for key in data
+                       if self._l2.has_key(key,
+                                           version=self._version(version))}
+        failed = self._l2.set_many(data, timeout,
+                                   version=self._version(version))
+        for family in overwritten:
+            versions[family] = self._bump(family)
+        for key, value in data.items():
+            if key not in failed:
+                family = namespace(key)
+                self._remember(self._l1_key(key, version), family,
+                               versions[family], value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget(self._l1_key(key, version))
+        return self._l2.touch(key, timeout, version=self._version(version))
+
+    def incr(self, key, delta=1, version=None):
+        value = self._l2.incr(key, delta, version=self._version(version))
+        family = namespace(key)
+        self._remember(self._l1_key(key, version), family,
+                       self._bump(family), value)
+        return value
+
+    def delete(self, key, version=None):
+        self._l2.delete(key, version=self._version(version))
+        self._bump(namespace(key))
+        self._forget(self._l1_key(key, version))
+
+    def delete_many(self, keys, version=None):
+        self._l2.delete_many(keys, version=self._version(version))
+        for family in set(map(namespace, keys)):
+            self._bump(family)
+        for key in keys:
+            self._forget(self._l1_key(key, version))
+
+    def clear(self):
+        self._l2.clear()
+        with self._local.lock:
+            self._local.entries.clear()
+            self._local.versions.clear()
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """FileBasedCache с атомарными для всех процессов add и incr.
+
+    У FileBasedCache add — проверка и запись, incr — чтение и запись,
+    между которыми успевает вклиниться другой процесс. Здесь оба идут под
+    блокировкой файла в каталоге кэша; decr сводится к incr.
+    """
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, LOCK_FILE), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked():
+            return super().incr(key, delta, version)
@@ -0,0 +1,228 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.files import locks
+
+# Границы корзин гистограмм, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+HISTOGRAMS = {
+    'request_seconds': 'Время ответа',
+    'db_seconds': 'Время SQL-запросов за ответ',
+    'template_seconds': 'Время отрисовки шаблонов за ответ',
+}
+COUNTERS = {
+    'requests_total': 'Число ответов',
+    'db_queries_total': 'Число SQL-запросов',
+    'cache_hits_total': 'Попадания в кэш',
+    'cache_misses_total': 'Промахи кэша',
+}
+PREFIX = 'yatube_'
+# Сумма снимков завершившихся процессов: без неё счётчики после
+# перезапуска воркеров шли бы назад, и rate() принимал бы это за сброс.
+RETIRED = 'retired.json'
+
+current = ContextVar('request_metrics', default=None)
+
+_lock = threading.Lock()
+_samples = defaultdict(float)
+_process = uuid.uuid4().hex
+_flushed = time.monotonic()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса, их пополняют обёртки SQL, шаблонов, кэша."""
+
+    __slots__ = ('db_queries', 'db_time', 'template_time',
+                 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;desc="{self.db_queries} queries";'
+            f'dur={self.db_time * 1000:.1f}',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit {self.cache_hits} / miss {self.cache_misses}"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+def count_cache(hits, misses=0):
+    metrics = current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def add_template_time(seconds):
+    metrics = current.get()
+    if metrics is not None:
+        metrics.template_time += seconds
+
+
+def _bucket(value):
+    for index, bound in enumerate(BUCKETS):
+        if value <= bound:
+            return index
+    return len(BUCKETS)
+
+
+def record(view, metrics, total):
+    """Добавляет запрос в гистограммы процесса."""
+    observed = (
+        ('request_seconds', total),
+        ('db_seconds', metrics.db_time),
+        ('template_seconds', metrics.template_time),
+    )
+    counted = (
+        ('requests_total', 1),
+        ('db_queries_total', metrics.db_queries),
+        ('cache_hits_total', metrics.cache_hits),
+        ('cache_misses_total', metrics.cache_misses),
+    )
+    with _lock:
+        for name, value in observed:
+            _samples[name, view, _bucket(value)] += 1
+            _samples[name, view, 'sum'] += value
+        for name, value in counted:
+            _samples[name, view, None] += value
+    if time.monotonic() - _flushed >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def snapshot():
+    with _lock:
+        return dict(_samples)
+
+
+def flush():
+    """Сохраняет снимок процесса в METRICS_DIR для слияния с остальными."""
+    global _flushed
+    _flushed = time.monotonic()
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR,
+                        f'{os.getpid()}-{_process}.json')
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as dump:
+        json.dump([[*key, value] for key, value in snapshot().items()], dump)
+    os.replace(temporary, path)
+
+
+def _alive(path):
+    """Жив ли процесс, оставивший снимок {pid}-{uuid}.json."""
+    pid = os.path.basename(path).split('-', 1)[0]
+    if not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as dump:
+            return json.load(dump)
+    except (OSError, ValueError):
+        return []
+
+
+def _retire(dead):
+    """Добавляет снимки завершившихся процессов в RETIRED и удаляет их.
+
+    Под блокировкой каталога: два одновременных сбора не добавят один
+    снимок дважды и не потеряют чужое добавление.
+    """
+    directory = settings.METRICS_DIR
+    with open(os.path.join(directory, '.lock'), 'ab') as lock:
+        locks.lock(lock, locks.LOCK_EX)
+        try:
+            retired = os.path.join(directory, RETIRED)
+            merged = defaultdict(float)
+            for path in (retired, *dead):
+                for name, view, index, value in _read(path):
+                    merged[name, view, index] += value
+            temporary = retired + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as dump:
+                json.dump([[*key, value] for key, value in merged.items()],
+                          dump)
+            os.replace(temporary, retired)
+            for path in dead:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        finally:
+            locks.unlock(lock)
+
+
+def collect():
+    """Сумма снимков всех процессов; свой берётся без задержки.
+
+    Снимки завершившихся процессов переносятся в RETIRED, чтобы каталог
+    не рос с каждым перезапуском воркеров, а счётчики не убывали.
+    """
+    if not settings.METRICS_DIR:
+        return snapshot()
+    flush()
+    pattern = os.path.join(settings.METRICS_DIR, '*.json')
+    dead = [path for path in glob.glob(pattern) if not _alive(path)]
+    if dead:
+        _retire(dead)
+    merged = defaultdict(float)
+    for path in glob.glob(pattern):
+        for name, view, index, value in _read(path):
+            merged[name, view, index] += value
+    return merged
+
+
+def _format(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(samples):
+    """Текстовый формат Prometheus."""
+    views = defaultdict(dict)
+    for (name, view, index), value in samples.items():
+        views[name, view][index] = value
+    lines = []
+    for name, help_text in HISTOGRAMS.items():
+        lines += [f'# HELP {PREFIX}{name} {help_text}.',
+                  f'# TYPE {PREFIX}{name} histogram']
+        for (metric, view), values in sorted(views.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for index, bound in enumerate((*BUCKETS, '+Inf')):
+                cumulative += values.get(index, 0)
+                lines.append(f'{PREFIX}{name}_bucket{{view="{view}",'
+                             f'le="{bound}"}} {_format(cumulative)}')
+            lines.append(f'{PREFIX}{name}_sum{{view="{view}"}} '
+                         f'{_format(values.get("sum", 0))}')
+            lines.append(f'{PREFIX}{name}_count{{view="{view}"}} '
+                         f'{_format(cumulative)}')
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {PREFIX}{name} {help_text}.',
+                  f'# TYPE {PREFIX}{name} counter']
+        for (metric, view), values in sorted(views.items()):
+            if metric == name:
+                lines.append(f'{PREFIX}{name}{{view="{view}"}} '
+                             f'{_format(values[None])}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,119 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+from .queryshapes import QueryShapes
+from .routers import primary_pinned
+from .throttling import client_ip
+
+logger = logging.getLogger('yatube.queries')
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class ReplicaPinMiddleware:
+    """Читает из основной базы после собственной записи посетителя.
+
+    Запрос, изменивший данные, ставит куку на REPLICA_PIN_SECONDS: пока
+    она жива, чтения этого браузера не уходят на отстающие реплики, и
+    новый пост виден на странице, куда ведёт редирект.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        token = primary_pinned.set(
+            settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        wrote = []
+
+        def watch_writes(execute, sql, params, many, context):
+            if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+                wrote.append(True)
+                primary_pinned.set(True)
+            return execute(sql, params, many, context)
+
+        try:
+            with connections['default'].execute_wrapper(watch_writes):
+                response = self.get_response(request)
+        finally:
+            primary_pinned.reset(token)
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+
+class MetricsMiddleware:
+    """Замеряет ответ: SQL, шаблоны, кэш и общее время.
+
+    Итог уходит в гистограммы процесса по имени view, которые отдаёт
+    /metrics, а для INTERNAL_IPS и сотрудников — ещё и в заголовок
+    Server-Timing: остальным незачем видеть, сколько запросов к базе
+    стоит страница.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+
+        def time_query(execute, sql, params, many, context):
+            query_started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                request_metrics.db_queries += 1
+                request_metrics.db_time += (
+                    time.perf_counter() - query_started)
+
+        try:
+            with ExitStack() as stack:
+                for alias in settings.DATABASES:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(time_query))
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        total = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        metrics.record(match.view_name if match else 'unresolved',
+                       request_metrics, total)
+        if self.show_timing(request):
+            response['Server-Timing'] = request_metrics.server_timing(total)
+        return response
+
+    def show_timing(self, request):
+        if client_ip(request) in settings.INTERNAL_IPS:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+
+class QueryShapeMiddleware:
+    """В режиме DEBUG предупреждает о запросах, повторённых больше
+    QUERY_SHAPE_LIMIT раз за ответ, со строкой шаблона или кода."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG or not settings.QUERY_SHAPE_LIMIT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryShapes(settings.QUERY_SHAPE_LIMIT) as shapes:
+            response = self.get_response(request)
+        if shapes.repeated:
+            logger.warning('Повторяющиеся запросы на %s:\n%s',
+                           request.path, shapes.report())
+        return response
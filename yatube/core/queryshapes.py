@@ -0,0 +1,96 @@
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+_DB_EXECUTE = os.path.join('django', 'db', 'backends', 'utils.py')
+
+
+class RepeatedQueriesError(AssertionError):
+    pass
+
+
+def shape(sql):
+    """Форма запроса: SQL без значений и без длины списков IN."""
+    sql = _LITERALS.sub('?', sql.replace('%s', '?'))
+    return _SPACES.sub(' ', _LISTS.sub('(...)', sql)).strip()
+
+
+def origin():
+    """Строка шаблона и код проекта, откуда пришёл текущий запрос к базе."""
+    frame = sys._getframe(1)
+    template = code = None
+    below_db = False
+    while frame is not None and template is None:
+        filename = frame.f_code.co_filename
+        if filename.endswith(_DB_EXECUTE):
+            below_db = True
+        elif (below_db and code is None
+              and filename.startswith(str(settings.BASE_DIR))):
+            code = f'{os.path.relpath(filename, settings.BASE_DIR)}:' \
+                   f'{frame.f_lineno}'
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            if getattr(node, 'token', None) and node.origin:
+                name = node.origin.template_name or node.origin.name
+                template = f'{name}:{node.token.lineno}'
+        frame = frame.f_back
+    return ' ← '.join(place for place in (template, code) if place) \
+        or 'неизвестно'
+
+
+class QueryShapes:
+    """Считает формы SQL-запросов, пока установлен на соединения.
+
+    Форма, встретившаяся больше limit раз, — признак N+1: для неё
+    запоминается место, откуда пришло первое лишнее повторение.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.counts = Counter()
+        self.origins = {}
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if any(table in sql for table in settings.QUERY_SHAPE_IGNORE):
+            return execute(sql, params, many, context)
+        key = shape(sql)
+        self.counts[key] += 1
+        if self.counts[key] == self.limit + 1:
+            self.origins[key] = origin()
+        return execute(sql, params, many, context)
+
+    def start(self):
+        self._stack = ExitStack()
+        for alias in settings.DATABASES:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self))
+        return self
+
+    def stop(self):
+        self._stack.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def repeated(self):
+        return {key: count for key, count in self.counts.items()
+                if count > self.limit}
+
+    def report(self):
+        return '\n'.join(
+            f'{count} раз, {self.origins[key]}:\n    {key}'
+            for key, count in sorted(self.repeated.items(),
+                                     key=lambda item: -item[1]))
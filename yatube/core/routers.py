@@ -0,0 +1,46 @@
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# Закреплён ли текущий контекст за основной базой. Вне запросов
+# (команды manage.py, shell) — всегда: они читают и по прочитанному
+# пишут. На реплики читает только запрос, см. ReplicaPinMiddleware.
+primary_pinned = contextvars.ContextVar('primary_pinned', default=True)
+
+
+@contextmanager
+def pin_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = primary_pinned.set(True)
+    try:
+        yield
+    finally:
+        primary_pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Записи — в default, чтения — на случайную из DATABASE_REPLICAS.
+
+    Чтения тоже идут в default, пока контекст закреплён за ней: вне
+    запроса, после собственной записи, внутри транзакции или в блоке
+    pin_primary().
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or primary_pinned.get()
+                or connections['default'].in_atomic_block):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,82 @@
+import gzip
+import io
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Картинки и шрифты уже сжаты, их повторное сжатие только тратит место.
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.map', '.txt',
+                '.xml', '.html')
+# Сжатая копия, выигрывающая меньше, не стоит отдельного файла.
+MIN_SAVING = 0.05
+
+
+def gzip_bytes(content):
+    """gzip без времени в заголовке: одинаковый файл — одинаковые байты."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(content)
+    return buffer.getvalue()
+
+
+def compressors():
+    yield '.gz', gzip_bytes
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хэшами в именах плюс сжатые копии .gz и .br рядом
+    с каждым текстовым файлом — их отдаёт core.wsgi_static.
+
+    .br пишется, только если установлен пакет brotli.
+    """
+
+    def stored_name(self, name):
+        # Без collectstatic (разработка, тесты) манифеста нет: отдаём
+        # исходное имя вместо ValueError на каждом {% static %}. Файл,
+        # которого нет в загруженном манифесте, — ошибка сборки, её не
+        # прячем.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.DEBUG or not self.hashed_files:
+                return name
+            raise
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(hashed):
+            if name.lower().endswith(COMPRESSIBLE):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        """Пишет сжатые копии файла, возвращает имена записанных."""
+        with self.open(name) as original:
+            content = original.read()
+        written = []
+        for suffix, compress in compressors():
+            data = compress(content)
+            if len(data) > len(content) * (1 - MIN_SAVING):
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(data))
+            written.append(target)
+        return written
@@ -0,0 +1,42 @@
+import time
+from contextvars import ContextVar
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+
+# Идёт ли уже отрисовка: её время включает время вложенных шаблонов.
+rendering = ContextVar('template_rendering', default=False)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        if rendering.get():
+            return super().render(context, request)
+        token = rendering.set(True)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            rendering.reset(token)
+            metrics.add_template_time(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, сообщающий время отрисовки в core.metrics.
+
+    Вложенные {% include %} идут мимо бэкенда, а render_to_string
+    изнутри отрисовки (карточки постов из тега шаблона) считается только
+    в составе внешнего шаблона, поэтому время не считается дважды.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,177 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import LockingFileBasedCache, TwoTierCache
+
+SHARED = {
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+}
+
+
+@override_settings(CACHES=SHARED)
+class TwoTierCacheTests(SimpleTestCase):
+    """Тестирует L1 процесса поверх общего L2"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = self.make_cache('first')
+        self.second = self.make_cache('second')
+
+    def make_cache(self, location, **options):
+        options = {'L2': 'shared', 'CHECK_INTERVAL': 3600, **options}
+        cache = TwoTierCache(location, {'OPTIONS': options})
+        cache.clear()
+        return cache
+
+    def new_request(self):
+        """Сигнал начала запроса без закрытия соединений с базой, как у
+        тестового клиента."""
+        request_started.disconnect(close_old_connections)
+        try:
+            request_started.send(sender=self.__class__)
+        finally:
+            request_started.connect(close_old_connections)
+
+    def test_l1_serves_reads(self):
+        """Прочитанное значение отдаётся из L1 без обращения к L2"""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        caches['shared'].delete('key')
+        self.assertEqual(self.second.get('key'), 'value')
+
+    def test_write_propagates_on_request(self):
+        """Запись в одном процессе видна другому со следующего запроса"""
+        self.first.set('key', 'old')
+        self.second.get('key')
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.new_request()
+        self.assertEqual(self.second.get('key'), 'new')
+
+    def test_delete_and_incr_propagate(self):
+        """Удаление и incr сбрасывают L1 других процессов"""
+        self.first.set('counter', 1)
+        self.first.set('gone', 1)
+        self.second.get_many(['counter', 'gone'])
+        self.first.incr('counter')
+        self.first.delete('gone')
+        self.new_request()
+        self.assertEqual(self.second.get_many(['counter', 'gone']),
+                         {'counter': 2})
+
+    def test_lru_bound(self):
+        """L1 хранит не больше L1_MAX_ENTRIES записей"""
+        cache = self.make_cache('bounded', L1_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        cache.get('b')
+        self.assertEqual(list(cache._local.entries),
+                         [cache.make_key('c'), cache.make_key('b')])
+
+    def test_add_is_delegated(self):
+        """add решает L2, поэтому блокировка общая для процессов"""
+        self.assertTrue(self.first.add('lock', 1))
+        self.assertFalse(self.second.add('lock', 1))
+        self.first.delete('lock')
+        self.assertTrue(self.second.add('lock', 1))
+
+    def test_unrelated_writes_keep_l1(self):
+        """Записи в другие семейства ключей не сбрасывают L1"""
+        self.first.set('posts:card:1', 'card')
+        self.second.get('posts:card:1')
+        self.first.set('posts:response:page', 'page')
+        self.first.add('posts:response:page:lock', 1)
+        self.first.delete('users:user:1')
+        self.first.incr('posts:response:page:lock')
+        self.new_request()
+        caches['shared'].delete('posts:card:1')
+        self.assertEqual(self.second.get('posts:card:1'), 'card')
+
+    def test_family_write_evicts(self):
+        """Перезапись ключа сбрасывает L1 его семейства в других процессах"""
+        self.first.set('posts:card:1', 'card')
+        self.first.set('posts:card:2', 'other')
+        self.second.get_many(['posts:card:1', 'posts:card:2'])
+        self.first.set('posts:card:1', 'new')
+        self.new_request()
+        caches['shared'].delete('posts:card:2')
+        self.assertEqual(self.second.get('posts:card:1'), 'new')
+        self.assertIsNone(self.second.get('posts:card:2'))
+
+    def test_new_keys_keep_l1(self):
+        """Новые ключи семейства не сбрасывают его записи в L1"""
+        self.first.set('posts:card:1', 'card')
+        self.second.get('posts:card:1')
+        self.first.set('posts:card:2', 'other')
+        self.first.set_many({'posts:card:3': 3})
+        self.first.add('posts:card:4', 4)
+        self.new_request()
+        caches['shared'].delete('posts:card:1')
+        self.assertEqual(self.second.get('posts:card:1'), 'card')
+
+    def test_values_are_copies(self):
+        """Изменение полученного объекта не видно следующему get()"""
+        session = {'user': 1}
+        self.first.set('session', session)
+        session['user'] = 2
+        value = self.first.get('session')
+        value['user'] = 3
+        self.assertEqual(self.first.get('session'), {'user': 1})
+
+    def test_version_checked_once_per_request(self):
+        """Версия семейства читается из L2 один раз за запрос"""
+        self.first.set_many({'posts:card:1': 1, 'posts:card:2': 2})
+        self.second.get_many(['posts:card:1', 'posts:card:2'])
+        self.new_request()
+        shared = caches['shared']
+        with mock.patch.object(shared, 'get', wraps=shared.get) as get:
+            self.second.get('posts:card:1')
+            self.second.get_many(['posts:card:1', 'posts:card:2'])
+        self.assertEqual(get.call_count, 1)
+
+
+class LockingFileBasedCacheTests(SimpleTestCase):
+    """Тестирует атомарные add и incr файлового кэша"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+
+    def race(self, action, threads=8):
+        def run():
+            # Свой экземпляр на поток, как у отдельных процессов.
+            action(LockingFileBasedCache(self.location, {}))
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_concurrent_incr(self):
+        """Одновременные incr не теряют приращений"""
+        LockingFileBasedCache(self.location, {}).set('counter', 0)
+
+        def increment(cache):
+            for _ in range(25):
+                cache.incr('counter')
+
+        self.race(increment)
+        self.assertEqual(
+            LockingFileBasedCache(self.location, {}).get('counter'), 200)
+
+    def test_concurrent_add(self):
+        """Из одновременных add удаётся ровно один"""
+        added = []
+        self.race(lambda cache: added.append(cache.add('lock', 1)))
+        self.assertEqual(added.count(True), 1)
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import User
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTests(TestCase):
+    """Тестирует Server-Timing и эндпоинт /metrics"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.INDEX_URL = reverse('posts:index')
+        cls.METRICS_URL = reverse('metrics')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_server_timing(self):
+        """Ответ описывает SQL, шаблоны, кэш и общее время"""
+        header = self.client.get(self.INDEX_URL)['Server-Timing']
+        for part in ('db;desc=', 'tpl;dur=', 'cache;desc="hit ',
+                     'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, header)
+
+    def test_server_timing_only_for_internal(self):
+        """Посторонним Server-Timing не отдаётся, сотрудникам — да"""
+        outside = {'REMOTE_ADDR': '203.0.113.5'}
+        response = self.client.get(self.INDEX_URL, **outside)
+        self.assertNotIn('Server-Timing', response)
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        response = self.client.get(self.INDEX_URL, **outside)
+        self.assertIn('Server-Timing', response)
+
+    def test_proxied_clients_are_outside(self):
+        """За прокси на localhost посторонние не видят ни метрик,
+        ни Server-Timing"""
+        proxied = {'REMOTE_ADDR': '127.0.0.1',
+                   'HTTP_X_FORWARDED_FOR': '203.0.113.5'}
+        with self.settings(THROTTLE_PROXY_HOPS=1):
+            self.assertNotIn('Server-Timing',
+                             self.client.get(self.INDEX_URL, **proxied))
+            self.assertEqual(
+                self.client.get(self.METRICS_URL, **proxied).status_code,
+                404)
+
+    def test_histograms_per_view(self):
+        """Запросы копятся в гистограммах по имени view"""
+        before = metrics.snapshot()
+        self.client.get(self.INDEX_URL)
+        after = metrics.snapshot()
+        key = ('requests_total', 'posts:index', None)
+        self.assertEqual(after[key] - before.get(key, 0), 1)
+        self.assertGreater(after[('db_queries_total', 'posts:index', None)],
+                           0)
+        body = self.client.get(self.METRICS_URL).content.decode()
+        self.assertIn('# TYPE yatube_request_seconds histogram', body)
+        self.assertIn('yatube_request_seconds_bucket{view="posts:index",'
+                      'le="+Inf"}', body)
+
+    def test_workers_merged(self):
+        """Снимки других процессов суммируются с текущим"""
+        key = ('requests_total', 'posts:index', None)
+        own = metrics.collect().get(key, 0)
+        with open(os.path.join(METRICS_DIR, 'other.json'), 'w') as dump:
+            json.dump([[*key, 5]], dump)
+        try:
+            self.assertEqual(metrics.collect()[key], own + 5)
+            self.assertIn(
+                f'yatube_requests_total{{view="posts:index"}} {int(own) + 5}',
+                self.client.get(self.METRICS_URL).content.decode())
+        finally:
+            os.remove(os.path.join(METRICS_DIR, 'other.json'))
+
+    def test_metrics_hidden_from_outside(self):
+        """Чужим адресам /metrics не отдаётся"""
+        response = self.client.get(self.METRICS_URL,
+                                   REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+
+    def test_dead_workers_retired(self):
+        """Снимок завершившегося процесса уходит в общий, счёт не убывает"""
+        key = ('requests_total', 'posts:index', None)
+        before = metrics.collect().get(key, 0)
+        worker = subprocess.Popen([sys.executable, '-c', ''])
+        worker.wait()
+        dead = os.path.join(METRICS_DIR, f'{worker.pid}-dead.json')
+        with open(dead, 'w') as dump:
+            json.dump([[*key, 5]], dump)
+        self.addCleanup(os.remove, os.path.join(METRICS_DIR,
+                                                metrics.RETIRED))
+        self.assertEqual(metrics.collect()[key], before + 5)
+        self.assertFalse(os.path.exists(dead))
+        self.assertEqual(metrics.collect()[key], before + 5)
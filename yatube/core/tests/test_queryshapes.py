@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import QueryShapeMiddleware
+from core.queryshapes import QueryShapes, shape
+from posts.models import Post
+
+User = get_user_model()
+
+
+class QueryShapesTests(TestCase):
+    """Тестирует поиск повторяющихся запросов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for i in range(5):
+            Post.objects.create(
+                text='Текст',
+                author=User.objects.create_user(username=f'author{i}'))
+        cls.TEMPLATE = Template(
+            '{% for post in posts %}\n{{ post.author.username }}\n'
+            '{% endfor %}')
+
+    def render(self):
+        return self.TEMPLATE.render(Context({'posts': Post.objects.all()}))
+
+    def test_shape_ignores_values(self):
+        """Запросы, отличающиеся значениями, имеют одну форму"""
+        self.assertEqual(
+            shape('SELECT * FROM t WHERE id = %s AND x IN (%s, %s) LIMIT 21'),
+            shape('SELECT *  FROM t WHERE id = %s AND x IN (%s) LIMIT 3'))
+        self.assertEqual(shape("SELECT 'a' FROM t"),
+                         shape("SELECT 'it''s' FROM t"))
+
+    def test_n_plus_one_found_in_template(self):
+        """Запрос в цикле шаблона помечается со строкой шаблона"""
+        with QueryShapes(3) as shapes:
+            self.render()
+        self.assertEqual(list(shapes.repeated.values()), [5])
+        self.assertIn('<unknown source>:2', shapes.report())
+        self.assertIn('auth_user', shapes.report())
+
+    def test_within_limit(self):
+        """Повторы в пределах лимита не считаются ошибкой"""
+        with QueryShapes(5) as shapes:
+            self.render()
+        self.assertEqual(shapes.repeated, {})
+
+    @override_settings(DEBUG=True, QUERY_SHAPE_LIMIT=3)
+    def test_middleware_logs(self):
+        """Отладочный middleware пишет повторы в лог"""
+        def view(request):
+            return HttpResponse(self.render())
+
+        middleware = QueryShapeMiddleware(view)
+        with self.assertLogs('yatube.queries', 'WARNING') as logs:
+            middleware(RequestFactory().get('/'))
+        self.assertIn('5 раз', logs.output[0])
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.routers import PrimaryReplicaRouter, pin_primary, primary_pinned
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Тестирует выбор базы роутером"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_router(self):
+        """Чтения запроса уходят на реплику, кроме закреплённых и
+        транзакций"""
+        token = primary_pinned.set(False)
+        self.addCleanup(primary_pinned.reset, token)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        with pin_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with mock.patch.object(connections['default'], 'in_atomic_block',
+                               True):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_outside_request_reads_primary(self):
+        """Вне запроса (команды manage.py) чтения идут в основную базу"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPinTests(TestCase):
+    """Тестирует закрепление посетителя за основной базой после записи"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.INDEX_URL = reverse('posts:index')
+        cls.CREATE_URL = reverse('posts:post_create')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def get_pinned(self, client, *args, **kwargs):
+        """Запрос, в котором записывается, были ли чтения закреплены."""
+        states = []
+
+        def spy(router, model, **hints):
+            states.append(primary_pinned.get())
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read',
+                               autospec=True, side_effect=spy):
+            response = client.get(*args, **kwargs)
+        return response, states
+
+    def test_write_pins_reader(self):
+        """После своей записи посетитель читает из основной базы"""
+        response = self.author_client.post(self.CREATE_URL,
+                                           {'text': 'Новый пост'})
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        _, states = self.get_pinned(self.author_client, self.INDEX_URL)
+        self.assertTrue(states)
+        self.assertTrue(all(states))
+
+    def test_reads_without_pin(self):
+        """Без записи чтения идут на реплики, кука не ставится"""
+        response, states = self.get_pinned(Client(), self.INDEX_URL)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(states)
+        self.assertFalse(any(states))
@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from core import staticfiles
+from core.wsgi_static import IMMUTABLE, PrecompressedStatic
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+def django_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, STATIC_MAX_AGE=60)
+class StaticPipelineTests(SimpleTestCase):
+    """Тестирует collectstatic со сжатием и отдачу сжатой статики"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'])
+        cls.hashed = staticfiles_storage.stored_name(CSS)
+        cls.app = PrecompressedStatic(django_app, STATIC_ROOT, '/static/')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def request(self, path, accept_encoding='', method='GET'):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method,
+                   'HTTP_ACCEPT_ENCODING': accept_encoding}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def read(self, name):
+        with open(os.path.join(STATIC_ROOT, name), 'rb') as source:
+            return source.read()
+
+    def test_manifest(self):
+        """Манифест ведёт к имени с хэшем, его же выдаёт {% static %}"""
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as source:
+            manifest = json.load(source)
+        self.assertEqual(manifest['paths'][CSS], self.hashed)
+        self.assertNotEqual(self.hashed, CSS)
+        self.assertEqual(static(CSS), '/static/' + self.hashed)
+
+    def test_compressed_siblings(self):
+        """Рядом с текстовым файлом лежат сжатые копии того же содержимого"""
+        original = self.read(self.hashed)
+        self.assertEqual(gzip.decompress(self.read(self.hashed + '.gz')),
+                         original)
+        if staticfiles.brotli is not None:
+            self.assertEqual(
+                staticfiles.brotli.decompress(self.read(self.hashed + '.br')),
+                original)
+
+    def test_images_not_compressed(self):
+        """Уже сжатые картинки не получают .gz и .br копий"""
+        for directory, _, names in os.walk(os.path.join(STATIC_ROOT, 'img')):
+            for name in names:
+                if name.endswith('.png'):
+                    with self.subTest(name=name):
+                        self.assertNotIn(name + '.gz', names)
+                        self.assertNotIn(name + '.br', names)
+
+    def test_serves_by_accept_encoding(self):
+        """Выбирается лучшая кодировка из принимаемых клиентом"""
+        url = '/static/' + self.hashed
+        cases = [('gzip, deflate', 'gzip'), ('identity', None),
+                 ('', None), ('gzip;q=0, deflate', None)]
+        if staticfiles.brotli is not None:
+            cases.append(('gzip, deflate, br', 'br'))
+        for accept_encoding, coding in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                status, headers, body = self.request(url, accept_encoding)
+                self.assertEqual(status, '200 OK')
+                self.assertEqual(headers.get('Content-Encoding'), coding)
+                self.assertEqual(headers['Vary'], 'Accept-Encoding')
+                self.assertEqual(int(headers['Content-Length']), len(body))
+                self.assertTrue(headers['Content-Type'].startswith(
+                    'text/css'))
+        status, headers, body = self.request(url, 'gzip')
+        self.assertEqual(gzip.decompress(body), self.read(self.hashed))
+
+    def test_cache_control(self):
+        """Имена с хэшем кэшируются навсегда, исходные — ненадолго"""
+        _, headers, _ = self.request('/static/' + self.hashed)
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        _, headers, _ = self.request('/static/' + CSS)
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=60')
+
+    def test_head(self):
+        """HEAD отдаёт заголовки без тела"""
+        _, headers, body = self.request('/static/' + self.hashed, 'gzip',
+                                        method='HEAD')
+        self.assertEqual(body, b'')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+
+    def test_other_requests_reach_django(self):
+        """Прочие адреса и методы уходят в приложение"""
+        for path, method in (('/', 'GET'), ('/static/missing.css', 'GET'),
+                             ('/static/' + self.hashed, 'POST')):
+            with self.subTest(path=path, method=method):
+                _, _, body = self.request(path, method=method)
+                self.assertEqual(body, b'django')
+
+    def test_without_manifest(self):
+        """Без collectstatic {% static %} отдаёт исходное имя"""
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(STATIC_ROOT=root):
+            self.assertEqual(static(CSS), '/static/' + CSS)
+
+    def test_missing_entry_raises(self):
+        """При собранном манифесте файл не из него — ошибка"""
+        with self.assertRaises(ValueError):
+            static('css/missing.css')
+        with override_settings(DEBUG=True):
+            self.assertEqual(staticfiles_storage.stored_name(
+                'css/missing.css'), 'css/missing.css')
@@ -0,0 +1,26 @@
+from unittest import mock
+
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+
+
+class Card:
+    """Значение, которое при выводе само рендерит шаблон, как карточки
+    постов из тега post_cards."""
+
+    def __str__(self):
+        return render_to_string('core/403.html')
+
+
+class TimedTemplatesTests(SimpleTestCase):
+    """Тестирует учёт времени отрисовки шаблонов"""
+
+    @mock.patch('core.template_backend.metrics.add_template_time')
+    def test_nested_render_counted_once(self, add_template_time):
+        """render_to_string изнутри шаблона не добавляет своё время"""
+        engine = engines.all()[0]
+        engine.from_string('{{ card }}{{ card }}').render({'card': Card()})
+        self.assertEqual(add_template_time.call_count, 1)
+        render_to_string('core/403.html')
+        self.assertEqual(add_template_time.call_count, 2)
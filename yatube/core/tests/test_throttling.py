@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.throttling import client_ip, consume, throttle
+
+User = get_user_model()
+
+
+@override_settings(THROTTLE_RATES={'test': (3, 60)}, THROTTLE_PROXY_HOPS=1)
+class ThrottleTests(SimpleTestCase):
+    """Тестирует ведро токенов в общем кэше"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.factory = RequestFactory()
+        self.view = throttle('test', by='ip')(
+            lambda request: HttpResponse('ok'))
+
+    def post(self, ip='10.0.0.1'):
+        return self.view(self.factory.post('/', REMOTE_ADDR=ip))
+
+    def test_burst_then_429(self):
+        """Ведро пропускает limit запросов подряд, дальше 429"""
+        for _ in range(3):
+            self.assertEqual(self.post().status_code, 200)
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+
+    def test_buckets_are_separate(self):
+        """У каждого адреса своё ведро"""
+        for _ in range(3):
+            self.post()
+        self.assertEqual(self.post(ip='10.0.0.2').status_code, 200)
+
+    def test_refill(self):
+        """Токены возвращаются равномерно, отказы их не тратят"""
+        with mock.patch('core.throttling.time.time', return_value=1000):
+            for _ in range(5):
+                self.post()
+        with mock.patch('core.throttling.time.time', return_value=1020):
+            self.assertEqual(self.post().status_code, 200)
+            self.assertEqual(self.post().status_code, 429)
+
+    def test_safe_methods_not_limited(self):
+        """GET по умолчанию не ограничивается"""
+        for _ in range(5):
+            response = self.view(self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_consume_reports_wait(self):
+        """consume возвращает время до следующего токена"""
+        with mock.patch('core.throttling.time.time', return_value=1000):
+            self.assertEqual(consume('test', 'x', 1, 30), 0)
+            self.assertEqual(consume('test', 'x', 1, 30), 30)
+
+    def test_rejection_does_not_write(self):
+        """Отказ определяется чтением, без incr и decr"""
+        cache = caches['shared']
+        for _ in range(3):
+            consume('test', 'x', 3, 60)
+        with mock.patch.object(cache, 'incr') as incr:
+            self.assertGreater(consume('test', 'x', 3, 60), 0)
+        incr.assert_not_called()
+
+    def test_client_ip_behind_proxy(self):
+        """Адрес клиента берётся из X-Forwarded-For за доверенным прокси"""
+        cases = [
+            ('', '10.0.0.9'),
+            ('203.0.113.5', '203.0.113.5'),
+            ('1.1.1.1, 203.0.113.5', '203.0.113.5'),
+        ]
+        for forwarded, ip in cases:
+            with self.subTest(forwarded=forwarded):
+                request = self.factory.post(
+                    '/', REMOTE_ADDR='10.0.0.9',
+                    HTTP_X_FORWARDED_FOR=forwarded)
+                self.assertEqual(client_ip(request), ip)
+        request = self.factory.post('/', REMOTE_ADDR='10.0.0.9',
+                                    HTTP_X_FORWARDED_FOR='1.1.1.1')
+        with self.settings(THROTTLE_PROXY_HOPS=0):
+            self.assertEqual(client_ip(request), '10.0.0.9')
+
+    def test_spoofed_header_shares_bucket(self):
+        """Подставленный клиентом X-Forwarded-For не даёт нового ведра"""
+        for spoofed in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            self.view(self.factory.post(
+                '/', REMOTE_ADDR='10.0.0.9',
+                HTTP_X_FORWARDED_FOR=f'{spoofed}, 203.0.113.5'))
+        response = self.view(self.factory.post(
+            '/', REMOTE_ADDR='10.0.0.9',
+            HTTP_X_FORWARDED_FOR='4.4.4.4, 203.0.113.5'))
+        self.assertEqual(response.status_code, 429)
+
+
+@override_settings(THROTTLE_RATES={'login': (2, 60), 'post_create': (1, 60)})
+class ThrottledViewsTests(TestCase):
+    """Тестирует ограничения на страницах записи"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.client = Client()
+
+    def test_login_rejected_before_db(self):
+        """Лишняя попытка входа отклоняется без запросов к базе"""
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(2):
+            self.client.post(reverse('users:login'), data)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('users:login'), data)
+        self.assertEqual(response.status_code, 429)
+
+    def test_post_create_per_user(self):
+        """Лимит на создание постов считается по пользователю"""
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        url = reverse('posts:post_create')
+        self.assertEqual(
+            self.client.post(url, {'text': 'Текст'}).status_code, 302)
+        self.assertEqual(
+            self.client.post(url, {'text': 'Текст'}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,80 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+def client_ip(request):
+    """Адрес клиента за THROTTLE_PROXY_HOPS доверенными прокси.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, от которого принял
+    запрос, поэтому клиент — hops-й адрес с конца цепочки, оканчивающейся
+    REMOTE_ADDR. Всё левее него мог подставить сам клиент.
+    """
+    chain = [address.strip() for address in request.META.get(
+        'HTTP_X_FORWARDED_FOR', '').split(',') if address.strip()]
+    chain.append(request.META.get('REMOTE_ADDR', ''))
+    return chain[max(0, len(chain) - 1 - settings.THROTTLE_PROXY_HOPS)]
+
+
+def client_key(request, by):
+    """Чьё ведро: пользователя или, для гостей и by='ip', адреса."""
+    if by == 'user' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'ip:' + client_ip(request)
+
+
+def consume(scope, ident, limit, period):
+    """Берёт токен из ведра на limit запросов, пополняемого за period секунд.
+
+    Ведро хранится одним целым числом — временем (в мс), к которому оно
+    снова наполнится, — и меняется только атомарными incr/decr общего
+    кэша. Пустое ведро видно по простому чтению, поэтому поток отказов
+    ничего в кэш не пишет. Возвращает 0 или через сколько секунд можно
+    повторить.
+    """
+    cache = caches[settings.THROTTLE_CACHE]
+    key = f'throttle:{scope}:{ident}'
+    interval = period * 1000 // limit
+    now = int(time.time() * 1000)
+    full_at = cache.get(key)
+    if full_at is not None:
+        overdraft = full_at + interval - now - limit * interval
+        if overdraft > 0:
+            return max(1, math.ceil(overdraft / 1000))
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        cache.add(key, now, math.ceil(interval / 1000) + 1)
+        full_at = cache.incr(key, interval)
+    overdraft = full_at - now - limit * interval
+    if overdraft > 0:
+        cache.decr(key, interval)
+        return max(1, math.ceil(overdraft / 1000))
+    cache.touch(key, math.ceil((full_at - now) / 1000) + 1)
+    return 0
+
+
+def throttle(scope, by='user', methods=('POST',)):
+    """Отвечает 429 сверх THROTTLE_RATES[scope] ещё до вызова view.
+
+    methods=None ограничивает запросы любым методом.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.THROTTLE_RATES.get(scope)
+            if rate and (methods is None or request.method in methods):
+                wait = consume(scope, client_key(request, by), *rate)
+                if wait:
+                    response = HttpResponse(
+                        'Слишком много запросов, попробуйте позже.',
+                        status=429, content_type='text/plain; charset=utf-8')
+                    response['Retry-After'] = str(wait)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
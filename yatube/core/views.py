@@ -1,6 +1,11 @@
 # core/views.py
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import collect, render as render_metrics
+from .throttling import client_ip
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -16,3 +21,11 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики всех процессов в формате Prometheus, только для своих."""
+    if client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(render_metrics(collect()),
+                        content_type='text/plain; version=0.0.4')
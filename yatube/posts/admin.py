@@ -1,6 +1,7 @@
 ﻿from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import ArchivedPost, Post, Group, Comment, Follow
+from .search import get_backend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,8 +17,20 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_backend().match(queryset, search_term), False
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'archived_at')
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
 
 admin.site.register(Post, PostAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
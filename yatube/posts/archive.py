@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from .counters import reconcile
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'updated_at', 'author_id',
+               'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+@transaction.atomic
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит в архив пачку постов старше cutoff вместе с комментариями.
+
+    Горячие строки удаляются обычным delete(): записи лент и поисковый
+    индекс уходят вместе с ними. Возвращает число перенесённых постов.
+    """
+    posts = list(Post.objects.filter(pub_date__lt=cutoff).order_by(
+        'pk').values(*POST_FIELDS)[:batch_size])
+    if not posts:
+        return 0
+    ids = [post['id'] for post in posts]
+    ArchivedPost.objects.bulk_create(
+        [ArchivedPost(**post) for post in posts], ignore_conflicts=True)
+    ArchivedComment.objects.bulk_create(
+        [ArchivedComment(**comment) for comment in Comment.objects.filter(
+            post_id__in=ids).values(*COMMENT_FIELDS).iterator()],
+        ignore_conflicts=True)
+    Post.objects.filter(pk__in=ids).delete()
+    reconcile(list({post['author_id'] for post in posts}))
+    return len(ids)
+
+
+def archive_old_posts(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Архивирует все посты старше days дней, пачками по batch_size."""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
@@ -0,0 +1,163 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .config import (
+    ANONYMOUS_CACHE_LOCK_TIMEOUT, ANONYMOUS_CACHE_STALE,
+    ANONYMOUS_CACHE_TIMEOUT, ANONYMOUS_CACHE_WAIT, CARD_CACHE_TIMEOUT,
+    LISTING_CACHE_TIMEOUT
+)
+
+GENERATION_KEY = 'posts:generation'
+RESPONSE_KEY = 'posts:response:{}'
+CARD_KEY = 'posts:card:{}:{}:{}'
+CARD_TEMPLATE = 'posts/includes/post.html'
+
+
+def get_generation():
+    """Текущее поколение контента лент, входит в ключи кэша."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Делает устаревшими все закэшированные фрагменты лент."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def fragment_cache_context():
+    return {
+        'cache_timeout': LISTING_CACHE_TIMEOUT,
+        'cache_generation': get_generation(),
+    }
+
+
+def card_key(post, variant):
+    """Ключ карточки: pk и updated_at поста плюс отпечаток того, что
+    карточка показывает из автора и группы, и флагов шаблона."""
+    group = post.group
+    fingerprint = ':'.join(map(str, (
+        variant, post.author.username, post.author.get_full_name(),
+        group.slug if group else '', group.title if group else '',
+    )))
+    return CARD_KEY.format(
+        post.pk, post.updated_at.timestamp(),
+        hashlib.md5(fingerprint.encode()).hexdigest())
+
+
+def render_cards(posts, **flags):
+    """Пары (пост, HTML карточки) для страницы.
+
+    Все карточки читаются одним get_many, рендерятся и кладутся одним
+    set_many только недостающие. Правка поста меняет updated_at и тем
+    самым ключ лишь его карточки.
+    """
+    posts = list(posts or ())
+    variant = ','.join(f'{name}={value}'
+                       for name, value in sorted(flags.items()))
+    keys = [card_key(post, variant) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {
+        key: render_to_string(CARD_TEMPLATE, {'post': post, **flags})
+        for key, post in zip(keys, posts) if key not in cards
+    }
+    if missing:
+        cache.set_many(missing, CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [(post, mark_safe(cards[key])) for key, post in zip(keys, posts)]
+
+
+def page_etag(request, *args, **kwargs):
+    """Слабый ETag HTML-страницы для условных GET.
+
+    Складывается из поколения контента, зрителя, его CSRF-куки и адреса
+    с параметрами и считается без рендера шаблона и пагинации.
+    """
+    user = request.user
+    fingerprint = ':'.join(map(str, (
+        get_generation(),
+        user.pk if user.is_authenticated else '',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(),
+    )))
+    return 'W/"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def is_anonymous_request(request):
+    """GET без куки сессии и CSRF: ответ не зависит от посетителя."""
+    return (request.method == 'GET'
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and settings.CSRF_COOKIE_NAME not in request.COOKIES)
+
+
+def response_key(path):
+    return RESPONSE_KEY.format(hashlib.md5(path.encode()).hexdigest())
+
+
+def _response(entry):
+    return HttpResponse(entry['content'], status=entry['status'],
+                        content_type=entry['content_type'])
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + ANONYMOUS_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def anonymous_cache(view):
+    """Кэширует ответы анонимным посетителям целиком.
+
+    Запись хранит поколение контента и срок свежести. Устаревшую запись
+    (по времени или после bump_generation) перестраивает один процесс,
+    взявший блокировку через cache.add, остальные пока отдают старую.
+    Если записи нет вовсе, остальные недолго ждут её появления.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_anonymous_request(request):
+            return view(request, *args, **kwargs)
+        key = response_key(request.get_full_path())
+        lock = key + ':lock'
+        entry = cache.get(key)
+        if entry is not None:
+            fresh = (entry['generation'] == get_generation()
+                     and entry['expires'] > time.time())
+            if fresh or not cache.add(lock, 1, ANONYMOUS_CACHE_LOCK_TIMEOUT):
+                return _response(entry)
+        elif not cache.add(lock, 1, ANONYMOUS_CACHE_LOCK_TIMEOUT):
+            entry = _wait_for(key)
+            if entry is not None:
+                return _response(entry)
+        try:
+            generation = get_generation()
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies):
+                cache.set(key, {
+                    'generation': generation,
+                    'expires': time.time() + ANONYMOUS_CACHE_TIMEOUT,
+                    'content': response.content,
+                    'status': response.status_code,
+                    'content_type': response['Content-Type'],
+                }, ANONYMOUS_CACHE_TIMEOUT + ANONYMOUS_CACHE_STALE)
+        finally:
+            cache.delete(lock)
+        return response
+    return wrapper
@@ -1 +1,43 @@
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+# Авторы с таким числом подписчиков не раскладываются по лентам,
+# их посты подмешиваются при чтении.
+FEED_FANOUT_LIMIT = 1000
+FEED_BATCH_SIZE = 500
+# Фрагменты лент сбрасываются сигналами, поэтому живут долго.
+LISTING_CACHE_TIMEOUT = 60 * 60 * 3
+# Карточка поста в ключе несёт свою версию и не сбрасывается вовсе.
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Ответы анонимам: столько секунд запись свежая, ещё столько отдаётся
+# устаревшей, пока один процесс её перестраивает.
+ANONYMOUS_CACHE_TIMEOUT = 60
+ANONYMOUS_CACHE_STALE = 60 * 10
+# Сколько держится блокировка перестройки и сколько ждут её без записи.
+ANONYMOUS_CACHE_LOCK_TIMEOUT = 10
+ANONYMOUS_CACHE_WAIT = 2
+# Конфигурация PostgreSQL для tsvector, совпадает с миграцией 0012.
+SEARCH_CONFIG = 'russian'
+# Размер пула процессов для тяжёлой работы с картинками; 0 — в текущем.
+WORKER_PROCESSES = 2
+# Миниатюры из шаблонов posts/includes/post.html и posts/post_detail.html.
+THUMBNAIL_GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+# Ограничения на загружаемые картинки постов.
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+MAX_IMAGE_SIDE = 2560
+INGEST_TIMEOUT = 30
+# Посты старше стольких дней переносятся в архивные таблицы.
+ARCHIVE_AFTER_DAYS = 365 * 2
+ARCHIVE_BATCH_SIZE = 500
+# Рекомендации авторов: сколько хранится на пользователя, сколько
+# показывается и сколько ячеек плотной матрицы считается за пачку.
+RECOMMENDATIONS_STORED = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_BATCH_CELLS = 2_000_000
+# Вкладка «Обсуждаемое»: период полураспада веса комментария, окно
+# комментариев для пересчёта и сколько постов остаётся в рейтинге.
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_WINDOW = 60 * 60 * 24 * 3
+TRENDING_SIZE = 1000
@@ -0,0 +1,71 @@
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import ArchivedPost, Follow, Post, User, UserStats
+
+FIELDS = ('posts_count', 'followers_count', 'following_count')
+
+
+def change(user_id, **deltas):
+    """Атомарно сдвигает счётчики пользователя через F().
+
+    Разошедшийся с данными счётчик не уходит ниже нуля: отрицательное
+    значение нарушило бы CHECK у PositiveIntegerField.
+    """
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta if delta >= 0
+        else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def count(user_ids):
+    """Точные значения счётчиков по данным таблиц."""
+    counts = {pk: dict.fromkeys(FIELDS, 0) for pk in user_ids}
+    queries = (
+        ('posts_count', Post.objects, 'author'),
+        ('posts_count', ArchivedPost.objects, 'author'),
+        ('followers_count', Follow.objects, 'author'),
+        ('following_count', Follow.objects, 'user'),
+    )
+    for field, manager, key in queries:
+        rows = manager.filter(**{f'{key}__in': user_ids}).order_by(
+        ).values(key).annotate(total=Count('pk')).values_list(key, 'total')
+        for pk, total in rows:
+            counts[pk][field] += total
+    return counts
+
+
+def reconcile(user_ids):
+    """Пересчитывает счётчики пачки пользователей, возвращает число правок."""
+    counts = count(user_ids)
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+    drifted = []
+    for stats in UserStats.objects.filter(user_id__in=user_ids):
+        actual = counts[stats.user_id]
+        if any(getattr(stats, field) != actual[field] for field in FIELDS):
+            for field in FIELDS:
+                setattr(stats, field, actual[field])
+            drifted.append(stats)
+    UserStats.objects.bulk_update(drifted, FIELDS)
+    return len(drifted)
+
+
+def get_stats(user):
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        reconcile([user.pk])
+        stats = UserStats.objects.get(user=user)
+    return stats
+
+
+def iter_user_batches(batch_size):
+    last_pk = 0
+    while True:
+        batch = list(User.objects.filter(pk__gt=last_pk).order_by(
+            'pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]
@@ -2,12 +2,27 @@ from django import forms
 
 from .models import Post
 from .models import Comment
+from .uploads import ingest_image
+
+
+class IngestedImageField(forms.FileField):
+    """Картинка проверяется по сигнатуре и нормализуется в пуле процессов.
+
+    В отличие от forms.ImageField, не декодирует файл в процессе запроса.
+    """
+
+    def to_python(self, data):
+        file = super().to_python(data)
+        if file is None:
+            return None
+        return ingest_image(file)
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': IngestedImageField}
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_old_posts
+from posts.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int,
+                            default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = archive_old_posts(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив постов: {total}'))
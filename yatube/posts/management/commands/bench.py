@@ -0,0 +1,253 @@
+import json
+import math
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.routers import pin_primary
+from posts import workers
+from posts.config import POSTS_PER_PAGE
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import encode_cursor
+from posts.seed import seed_dataset
+
+User = get_user_model()
+
+Route = namedtuple('Route', 'name method client url data')
+# Тот же двухуровневый кэш, но с L2 в памяти процесса: замеры очищают
+# кэш и кладут в него страницы тестовой базы под рабочими ключами,
+# общий кэш сайта они трогать не должны. Смена CACHES в override_settings
+# сбрасывает django.core.cache.caches на входе и на выходе.
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'bench',
+        'OPTIONS': {'L2': 'shared'},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench',
+    },
+}
+
+
+def percentile(values, q):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def deep_cursor(posts, pages):
+    """Курсор, открывающий страницу номер pages + 1 (или последнюю)."""
+    posts = posts.order_by('-pub_date', '-pk').values_list('pub_date', 'pk')
+    offset = min(pages * POSTS_PER_PAGE, posts.count()) - 1
+    if offset < 0:
+        return ''
+    return '?after=' + encode_cursor(posts[offset])
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу воспроизводимым набором данных и замеряет '
+            'задержку и число запросов для страниц приложения posts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--follows', type=int, default=15,
+                            help='Среднее число подписок на пользователя')
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--images', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--depth', type=int, default=20,
+                            help='Номер «глубокой» страницы в списках')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом')
+        parser.add_argument('--output', default='bench.json')
+        parser.add_argument(
+            '--no-isolate', dest='isolate', action='store_false',
+            help='Работать в текущей базе, а не в отдельной тестовой')
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='yatube-bench-')
+        old_name = None
+        if options['isolate']:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True)
+        # Процессы пула подняли бы Django с исходной базой и MEDIA_ROOT,
+        # поэтому фоновые задачи на время замеров выполняются на месте.
+        processes, workers.WORKER_PROCESSES = workers.WORKER_PROCESSES, 0
+        # Замеры повторяют записи сотни раз, ограничения частоты им мешают.
+        try:
+            with override_settings(MEDIA_ROOT=media_root, CACHES=BENCH_CACHES,
+                                   THROTTLE_RATES={}), pin_primary():
+                results = self.run(options)
+        finally:
+            workers.WORKER_PROCESSES = processes
+            if options['isolate']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+        self.report(results['routes'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'))
+
+    def run(self, options):
+        cache.clear()
+        dataset = seed_dataset(
+            users=options['users'], posts=options['posts'],
+            groups=options['groups'], follows=options['follows'],
+            comments=options['comments'], images=options['images'],
+            seed=options['seed'],
+        )
+        routes = {}
+        for route in self.routes(options['depth']):
+            routes[route.name] = self.measure(route, options)
+        return {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'dataset': dataset,
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cold': options['cold'],
+                'depth': options['depth'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'routes': routes,
+        }
+
+    def routes(self, depth):
+        reader = User.objects.filter(username__startswith='bench_user_') \
+            .annotate(n=Count('follower')).order_by('-n', 'pk').first()
+        author = User.objects.filter(username__startswith='bench_user_') \
+            .annotate(n=Count('posts')).order_by('-n', 'pk').first()
+        group = Group.objects.annotate(n=Count('posts')) \
+            .order_by('-n', 'pk').first()
+        post = Post.objects.filter(author=author) \
+            .annotate(n=Count('comments')).order_by('-n', 'pk').first()
+        word = max(post.text.split(), key=len).strip('.,!?').lower()
+        target = User.objects.exclude(pk=reader.pk).filter(
+            username__startswith='bench_user_').order_by('pk').last()
+
+        guest = Client()
+        user = Client()
+        user.force_login(reader)
+        owner = Client()
+        owner.force_login(author)
+
+        def throwaway_post():
+            return reverse('posts:post_delete', args=[Post.objects.create(
+                author=author, text='bench').pk])
+
+        def throwaway_comment():
+            return reverse('posts:delete_comment', args=[
+                Comment.objects.create(
+                    post=post, author=author, text='bench').pk])
+
+        def unfollowed():
+            Follow.objects.filter(user=reader, author=target).delete()
+            return reverse('posts:profile_follow', args=[target.username])
+
+        def followed():
+            Follow.objects.get_or_create(user=reader, author=target)
+            return reverse('posts:profile_unfollow', args=[target.username])
+
+        index = reverse('posts:index')
+        group_url = reverse('posts:group_list', args=[group.slug])
+        profile = reverse('posts:profile', args=[author.username])
+        return [
+            Route('index', 'get', guest, index, None),
+            Route('index_deep', 'get', guest,
+                  index + deep_cursor(Post.objects.all(), depth), None),
+            Route('index_user', 'get', user, index, None),
+            Route('trending', 'get', guest, reverse('posts:trending'), None),
+            Route('group_list', 'get', guest, group_url, None),
+            Route('group_list_deep', 'get', guest,
+                  group_url + deep_cursor(group.posts.all(), depth), None),
+            Route('profile', 'get', guest, profile, None),
+            Route('profile_deep', 'get', guest,
+                  profile + deep_cursor(author.posts.all(), depth), None),
+            Route('post_detail', 'get', guest,
+                  reverse('posts:post_detail', args=[post.pk]), None),
+            Route('follow_index', 'get', user,
+                  reverse('posts:follow_index'), None),
+            Route('search', 'get', guest,
+                  reverse('posts:search'), {'q': word}),
+            Route('search_api', 'get', guest,
+                  reverse('posts:search_api'), {'q': word}),
+            Route('post_create_form', 'get', owner,
+                  reverse('posts:post_create'), None),
+            Route('post_create', 'post', owner,
+                  reverse('posts:post_create'), {'text': 'Замер'}),
+            Route('post_edit', 'post', owner,
+                  reverse('posts:post_edit', args=[post.pk]),
+                  {'text': post.text}),
+            Route('add_comment', 'post', user,
+                  reverse('posts:add_comment', args=[post.pk]),
+                  {'text': 'Замер'}),
+            Route('delete_comment', 'get', owner, throwaway_comment, None),
+            Route('post_delete', 'get', owner, throwaway_post, None),
+            Route('profile_follow', 'get', user, unfollowed, None),
+            Route('profile_unfollow', 'get', user, followed, None),
+        ]
+
+    def measure(self, route, options):
+        timings, queries, statuses = [], [], set()
+        for step in range(options['warmup'] + options['iterations']):
+            url = route.url() if callable(route.url) else route.url
+            if options['cold']:
+                cache.clear()
+            request = getattr(route.client, route.method)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request(url, route.data)
+                elapsed = time.perf_counter() - start
+            if step < options['warmup']:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries_median': statistics.median(queries),
+            'queries_max': max(queries),
+            'status': sorted(statuses),
+        }
+
+    def report(self, routes):
+        self.stdout.write(
+            f'{"страница":<20}{"p50":>10}{"p95":>10}{"p99":>10}'
+            f'{"запросы":>10}')
+        for name, result in routes.items():
+            self.stdout.write(
+                f'{name:<20}{result["p50_ms"]:>10.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                f'{result["queries_max"]:>10}')
@@ -0,0 +1,66 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    FIELDS, KINDS, export_pages, read_checkpoint, write_checkpoint
+)
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты, комментарии и подписки в JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл или - для stdout')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--kind', choices=KINDS, action='append',
+                            help='Что выгружать; по умолчанию всё')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с последними выгруженными pk для продолжения')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or (
+            'csv' if options['output'].endswith('.csv') else 'jsonl')
+        kinds = options['kind'] or KINDS
+        if fmt == 'csv' and len(kinds) != 1:
+            raise CommandError('В CSV выгружается один тип записей, '
+                               'укажите --kind')
+        state = read_checkpoint(options['checkpoint'], {})
+        if options['output'] == '-':
+            self.export(sys.stdout, fmt, kinds, state, options)
+        else:
+            with open(options['output'], 'a' if state else 'w',
+                      encoding='utf-8', newline='') as output:
+                # Строки, дописанные после последней контрольной точки,
+                # будут выгружены заново — отрезаем их.
+                if 'offset' in state:
+                    output.truncate(state['offset'])
+                self.export(output, fmt, kinds, state, options)
+
+    def export(self, output, fmt, kinds, state, options):
+        total = 0
+        for kind in kinds:
+            if fmt == 'csv':
+                writer = csv.DictWriter(output, FIELDS[kind])
+                if not state:
+                    writer.writeheader()
+                write = writer.writerow
+            else:
+                def write(record, kind=kind):
+                    output.write(json.dumps(
+                        {'type': kind, **record}, ensure_ascii=False) + '\n')
+            for page in export_pages(kind, state.get(kind, 0),
+                                     options['chunk_size']):
+                for record in page:
+                    write(record)
+                output.flush()
+                state[kind] = page[-1]['id']
+                if output.seekable():
+                    state['offset'] = output.tell()
+                write_checkpoint(options['checkpoint'], state)
+                total += len(page)
+        self.stderr.write(self.style.SUCCESS(f'Выгружено записей: {total}'))
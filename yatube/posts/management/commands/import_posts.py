@@ -0,0 +1,110 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.routers import pin_primary
+
+from posts.transfer import (
+    KINDS, ImportConflict, Touched, finish_import, import_records,
+    read_checkpoint, rebuild_touched, write_checkpoint
+)
+
+
+class Command(BaseCommand):
+    help = 'Потоково загружает посты, комментарии и подписки из JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл или - для stdin')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--kind', choices=KINDS,
+                            help='Тип записей в CSV-файле')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Записей в одной транзакции')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней загруженной строки')
+        parser.add_argument(
+            '--no-finish', dest='finish', action='store_false',
+            help='Не пересобирать счётчики, ленты и поиск')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or (
+            'csv' if options['input'].endswith('.csv') else 'jsonl')
+        if fmt == 'csv' and not options['kind']:
+            raise CommandError('Для CSV укажите тип записей через --kind')
+        try:
+            with pin_primary():
+                if options['input'] == '-':
+                    total, latest = self.load(sys.stdin, fmt, options)
+                else:
+                    with open(options['input'], encoding='utf-8',
+                              newline='') as source:
+                        total, latest = self.load(source, fmt, options)
+        except ImportConflict as error:
+            raise CommandError(str(error))
+        if options['finish']:
+            finish_import(latest)
+        self.stdout.write(self.style.SUCCESS(f'Загружено записей: {total}'))
+
+    def records(self, source, fmt, kind):
+        if fmt == 'csv':
+            for row in csv.DictReader(source):
+                yield kind, row
+            return
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                yield record.pop('type'), record
+
+    def load(self, source, fmt, options):
+        """Загружает строки после контрольной точки пачками.
+
+        Возвращает число загруженных записей и время самого свежего
+        комментария — оно хранится и в контрольной точке, чтобы
+        продолженная загрузка знала о комментариях прошлых запусков.
+        """
+        checkpoint = options['checkpoint']
+        state = read_checkpoint(checkpoint, {'line': 0})
+        done = state['line']
+        latest = parse_datetime(state.get('latest_comment') or '')
+        batch, total, line = [], 0, done
+        for line, item in enumerate(
+                self.records(source, fmt, options['kind']), 1):
+            if line <= done:
+                continue
+            batch.append(item)
+            if len(batch) == options['batch_size']:
+                total += len(batch)
+                latest = self.flush(batch, latest, options)
+                self.save_state(checkpoint, line, latest)
+                batch = []
+        if batch:
+            total += len(batch)
+            latest = self.flush(batch, latest, options)
+        self.save_state(checkpoint, line, latest)
+        return total, latest
+
+    def save_state(self, checkpoint, line, latest):
+        write_checkpoint(checkpoint, {
+            'line': line,
+            'latest_comment': latest.isoformat() if latest else None,
+        })
+
+    @transaction.atomic
+    def flush(self, batch, latest, options):
+        for kind in KINDS:
+            records = [record for item_kind, record in batch
+                       if item_kind == kind]
+            if records:
+                import_records(kind, records)
+        touched = Touched(batch)
+        if options['finish']:
+            rebuild_touched(touched)
+        if latest is None or (touched.latest_comment
+                              and touched.latest_comment > latest):
+            latest = touched.latest_comment
+        return latest
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.config import RECOMMENDATIONS_BATCH_CELLS, RECOMMENDATIONS_STORED
+from posts.recommendations import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по графу подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int,
+                            default=RECOMMENDATIONS_STORED)
+        parser.add_argument('--batch-cells', type=int,
+                            default=RECOMMENDATIONS_BATCH_CELLS)
+
+    def handle(self, *args, **options):
+        total = rebuild(options['top'], options['batch_cells'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено рекомендаций: {total}'))
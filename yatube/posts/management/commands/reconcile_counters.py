@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.routers import pin_primary
+from posts.counters import iter_user_batches, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов и подписок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = drifted = 0
+        # Счётчики сверяются с основной базой, а не с отстающей репликой.
+        with pin_primary():
+            for batch in iter_user_batches(options['batch_size']):
+                drifted += reconcile(batch)
+                users += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено пользователей: {users}, исправлено: {drifted}'))
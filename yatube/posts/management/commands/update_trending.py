@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг обсуждаемых постов с учётом затухания'
+
+    def handle(self, *args, **options):
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов в рейтинге: {total}'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts import workers
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+class Command(BaseCommand):
+    help = 'Заранее создаёт миниатюры для уже загруженных картинок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True).order_by('pk')
+        done = failed = 0
+        batch = []
+        for name in names.iterator():
+            batch.append(workers.submit(generate, name))
+            if len(batch) == options['batch_size']:
+                done, failed = self.wait(batch, done, failed)
+                batch = []
+        done, failed = self.wait(batch, done, failed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок обработано: {done}, с ошибками: {failed}'))
+
+    def wait(self, futures, done, failed):
+        for future in futures:
+            if future.exception() is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(str(future.exception()))
+        return done, failed
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE posts_post ADD COLUMN search_vector tsvector '
+            "GENERATED ALWAYS AS (to_tsvector('russian'::regconfig, text)) "
+            'STORED'
+        )
+        schema_editor.execute(
+            'CREATE INDEX posts_post_search_idx ON posts_post '
+            'USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_post_fts USING fts5(text)'
+        )
+        schema_editor.execute(
+            'INSERT INTO posts_post_fts (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX posts_post_search_idx')
+        schema_editor.execute(
+            'ALTER TABLE posts_post DROP COLUMN search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from posts.config import FEED_FANOUT_LIMIT
+
+
+def backfill_feed(apps, schema_editor):
+    # Подписчики считаются по posts_follow: UserStats на этот момент
+    # может быть ещё не заполнена.
+    schema_editor.execute(
+        'INSERT INTO posts_feedentry (user_id, post_id, author_id, pub_date) '
+        'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        'FROM posts_follow f '
+        'JOIN posts_post p ON p.author_id = f.author_id '
+        'WHERE f.author_id NOT IN ('
+        'SELECT author_id FROM posts_follow GROUP BY author_id '
+        'HAVING COUNT(*) >= %s) '
+        'AND NOT EXISTS (SELECT 1 FROM posts_feedentry e '
+        'WHERE e.user_id = f.user_id AND e.post_id = p.id)',
+        (FEED_FANOUT_LIMIT,),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_userstats(apps, schema_editor):
+    users = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    schema_editor.execute(
+        'INSERT INTO posts_userstats (user_id, posts_count, '
+        'followers_count, following_count) '
+        'SELECT u.id, '
+        '(SELECT COUNT(*) FROM posts_post p WHERE p.author_id = u.id) + '
+        '(SELECT COUNT(*) FROM posts_archivedpost a '
+        'WHERE a.author_id = u.id), '
+        '(SELECT COUNT(*) FROM posts_follow f WHERE f.author_id = u.id), '
+        '(SELECT COUNT(*) FROM posts_follow f WHERE f.user_id = u.id) '
+        f'FROM {schema_editor.quote_name(users)} u '
+        'WHERE NOT EXISTS (SELECT 1 FROM posts_userstats s '
+        'WHERE s.user_id = u.id)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_backfill_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_userstats, migrations.RunPython.noop),
+    ]
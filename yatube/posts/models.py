@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -19,12 +20,39 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Посты для лент: автор и группа одним JOIN, только нужные поля."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated_at', 'image', 'author_id',
+            'group_id',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug', 'group__title',
+        )
+
+    def get_or_archived(self, **kwargs):
+        """Пост из горячей таблицы, а если его там нет — из архива."""
+        try:
+            return self.get(**kwargs)
+        except self.model.DoesNotExist:
+            try:
+                return ArchivedPost.objects.select_related(
+                    'author', 'group').get(**kwargs)
+            except ArchivedPost.DoesNotExist:
+                raise self.model.DoesNotExist from None
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста')
     pub_date = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -46,14 +74,35 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = PostQuerySet.as_manager()
+
+    is_archived = False
+    # Имя картинки на момент загрузки из базы: миниатюры создаются
+    # заново, только если оно изменилось.
+    loaded_image = None
+
     class Meta:
         ordering = ('-pub_date'),
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
         verbose_name = 'Пост',
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_image = instance.__dict__.get('image')
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -70,12 +119,18 @@ class Comment(models.Model):
     )
     text = models.TextField(verbose_name='Текст комментария')
     created = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Дата комментария'
     )
 
     class Meta:
         ordering = ('-created'),
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+            models.Index(fields=['-created'], name='comment_created_idx'),
+        ]
         verbose_name = 'Комментарий',
         verbose_name_plural = 'Комментарии'
 
@@ -97,5 +152,185 @@ class Follow(models.Model):
     class Meta:
         constraints = [models.UniqueConstraint(fields=['author',
                        'user'], name='unique_link')]
+        indexes = [models.Index(fields=['user', 'author'],
+                   name='follow_user_author_idx')]
         verbose_name = 'Подписка',
         verbose_name_plural = 'Подписки'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'post'],
+                       name='unique_feed_entry')]
+        indexes = [models.Index(fields=['user', '-pub_date', '-post'],
+                   name='feed_user_pub_date_idx')]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из posts_post командой archive_posts.
+
+    id сохраняется, поэтому адрес поста не меняется.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    updated_at = models.DateTimeField(verbose_name='Дата изменения')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    archived_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата архивации'
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ('-pub_date'),
+        indexes = [models.Index(fields=['author', '-pub_date', '-id'],
+                   name='archived_author_pub_date_idx')]
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    created = models.DateTimeField(verbose_name='Дата комментария')
+
+    class Meta:
+        ordering = ('-created'),
+        indexes = [models.Index(fields=['post', '-created', '-id'],
+                   name='archived_comment_post_idx')]
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+
+class AuthorRecommendation(models.Model):
+    """Рекомендованный автор; таблицу целиком пересобирает
+    команда recommend_authors."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'author'],
+                       name='unique_recommendation')]
+        indexes = [models.Index(fields=['user', '-score'],
+                   name='recommendation_user_score_idx')]
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+
+
+class PostScore(models.Model):
+    """Вес поста во вкладке «Обсуждаемое».
+
+    score — логарифм суммы весов комментариев exp(λ·(t − LANDMARK)) из
+    posts.trending: порядок по нему не меняется со временем, поэтому
+    новые комментарии увеличивают его на месте, без пересчёта остальных.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост'
+    )
+    score = models.FloatField(verbose_name='Вес')
+
+    class Meta:
+        indexes = [models.Index(fields=['-score', '-post'],
+                   name='post_score_idx')]
+        verbose_name = 'Вес обсуждения'
+        verbose_name_plural = 'Веса обсуждений'
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.db.models import F, Q
+
+
+def keyset(queryset, value='pub_date', pk='pk'):
+    """Размечает queryset ключом (value, pk) для курсорной пагинации."""
+    return queryset.annotate(
+        cursor_value=F(value) if isinstance(value, str) else value,
+        cursor_pk=F(pk),
+    )
+
+
+def encode_cursor(key):
+    value, pk = key
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps([value, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (value, pk) из курсора или None, если курсор испорчен."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk = json.loads(raw.decode())
+        return value, int(pk)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    """Страница курсорной пагинации: без номеров, только «назад/вперёд».
+
+    Запрос к базе выполняется при первом обращении к странице, поэтому
+    попадание во фрагментный кэш шаблона обходится без него.
+    """
+
+    is_cursor = True
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = self.paginator.fetch_page(self.after, self.before)
+        return self._page
+
+    @property
+    def object_list(self):
+        return self._load()[0]
+
+    @property
+    def next_cursor(self):
+        return self._load()[1]
+
+    @property
+    def previous_cursor(self):
+        return self._load()[2]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по убыванию (value, pk) без COUNT и OFFSET.
+
+    Принимает один или несколько querysets, размеченных через keyset();
+    записи из нескольких источников сливаются в один упорядоченный поток.
+    fallback — источник более старых записей (архив): вперёд он читается,
+    только когда основные источники не заполнили страницу.
+    """
+
+    def __init__(self, sources, per_page, fallback=None):
+        if not isinstance(sources, (list, tuple)):
+            sources = [sources]
+        self.sources = sources
+        self.per_page = per_page
+        self.fallback = fallback
+
+    def get_page(self, after=None, before=None):
+        return CursorPage(self, after, before)
+
+    def fetch_page(self, after=None, before=None):
+        """Возвращает (объекты, следующий курсор, предыдущий курсор)."""
+        before_key = decode_cursor(before)
+        if before_key is not None:
+            objects = self._fetch(before_key, forward=False)
+            if len(objects) <= self.per_page:
+                return self.fetch_page()
+            objects = objects[:self.per_page][::-1]
+            return (
+                objects,
+                encode_cursor(self._key(objects[-1])),
+                encode_cursor(self._key(objects[0])),
+            )
+        after_key = decode_cursor(after)
+        objects = self._fetch(after_key, forward=True)
+        has_next = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        return (
+            objects,
+            encode_cursor(self._key(objects[-1])) if has_next else None,
+            (encode_cursor(self._key(objects[0]))
+             if after_key is not None and objects else None),
+        )
+
+    def _fetch(self, key, forward):
+        streams = [self._query(source, key, forward)
+                   for source in self.sources]
+        if self.fallback is not None and (
+                not forward or sum(map(len, streams)) <= self.per_page):
+            streams.append(self._query(self.fallback, key, forward))
+        if len(streams) == 1:
+            return streams[0]
+        merged, seen = [], set()
+        for obj in heapq.merge(*streams, key=self._key, reverse=forward):
+            if obj.pk in seen:
+                continue
+            seen.add(obj.pk)
+            merged.append(obj)
+            if len(merged) > self.per_page:
+                break
+        return merged
+
+    def _query(self, source, key, forward):
+        if forward:
+            ordering, lookup = ('-cursor_value', '-cursor_pk'), 'lt'
+        else:
+            ordering, lookup = ('cursor_value', 'cursor_pk'), 'gt'
+        if key is not None:
+            value, pk = key
+            source = source.filter(
+                Q(**{f'cursor_value__{lookup}': value})
+                | Q(cursor_value=value, **{f'cursor_pk__{lookup}': pk})
+            )
+        return list(source.order_by(*ordering)[:self.per_page + 1])
+
+    @staticmethod
+    def _key(obj):
+        return obj.cursor_value, obj.cursor_pk
@@ -0,0 +1,95 @@
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from . import caching
+from .config import (FEED_BATCH_SIZE, RECOMMENDATIONS_BATCH_CELLS,
+                     RECOMMENDATIONS_STORED)
+from .models import AuthorRecommendation, Follow
+
+
+def follow_matrix():
+    """Разреженная матрица подписок пользователь × автор.
+
+    Возвращает (матрица, pk строк, pk столбцов); pk отсортированы.
+    """
+    pairs = np.array(
+        Follow.objects.order_by().values_list('user_id', 'author_id'),
+        dtype=np.int64).reshape(-1, 2)
+    users, rows = np.unique(pairs[:, 0], return_inverse=True)
+    authors, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32),
+         (rows.ravel(), columns.ravel())),
+        shape=(len(users), len(authors)))
+    return matrix, users, authors
+
+
+def author_similarity(matrix):
+    """Косинусная близость авторов по общим подписчикам, без диагонали."""
+    overlap = (matrix.T @ matrix).tocsr()
+    norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    scale = sparse.diags(1 / np.maximum(norms, 1))
+    similarity = (scale @ overlap @ scale).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_authors(matrix, similarity, users, authors,
+                top=RECOMMENDATIONS_STORED,
+                batch_cells=RECOMMENDATIONS_BATCH_CELLS):
+    """Пачками выдаёт (user_pk, author_pk, score) для лучших top авторов.
+
+    Оценка автора — сумма его близости к авторам, на которых пользователь
+    уже подписан. Подписки и сам пользователь из кандидатов исключаются.
+    """
+    if not len(users):
+        return
+    top = min(top, len(authors))
+    batch_size = max(1, batch_cells // len(authors))
+    # Столбец пользователя среди авторов или -1, если на него не подписаны.
+    own = np.searchsorted(authors, users)
+    own[own == len(authors)] = 0
+    own = np.where(authors[own] == users, own, -1)
+    for start in range(0, len(users), batch_size):
+        rows = matrix[start:start + batch_size]
+        scores = (rows @ similarity).toarray()
+        followed_rows, followed_columns = rows.nonzero()
+        scores[followed_rows, followed_columns] = 0
+        batch_own = own[start:start + batch_size]
+        has_own = batch_own >= 0
+        scores[np.flatnonzero(has_own), batch_own[has_own]] = 0
+        best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        keep_rows, keep_columns = np.nonzero(best_scores > 0)
+        yield list(zip(
+            users[start + keep_rows].tolist(),
+            authors[best[keep_rows, keep_columns]].tolist(),
+            best_scores[keep_rows, keep_columns].tolist(),
+        ))
+
+
+def rebuild(top=RECOMMENDATIONS_STORED,
+            batch_cells=RECOMMENDATIONS_BATCH_CELLS):
+    """Пересчитывает таблицу рекомендаций целиком, возвращает число строк.
+
+    Поколение страниц меняется после фиксации: иначе страница, собранная
+    до неё, закэшировалась бы с новым поколением и старыми
+    рекомендациями.
+    """
+    matrix, users, authors = follow_matrix()
+    similarity = author_similarity(matrix)
+    total = 0
+    with transaction.atomic():
+        AuthorRecommendation.objects.all().delete()
+        for batch in top_authors(matrix, similarity, users, authors,
+                                 top, batch_cells):
+            AuthorRecommendation.objects.bulk_create(
+                [AuthorRecommendation(user_id=user, author_id=author,
+                                      score=score)
+                 for user, author, score in batch],
+                batch_size=FEED_BATCH_SIZE)
+            total += len(batch)
+    caching.bump_generation()
+    return total
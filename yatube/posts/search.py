@@ -0,0 +1,127 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .config import FEED_BATCH_SIZE, SEARCH_CONFIG
+from .models import Post
+from .paginators import keyset
+
+
+class PostgresSearch:
+    """tsvector-колонка posts_post.search_vector с GIN-индексом.
+
+    Колонка генерируемая, поэтому PostgreSQL сам держит её актуальной.
+    """
+
+    def match(self, queryset, query):
+        return queryset.extra(
+            where=['search_vector @@ plainto_tsquery(%s::regconfig, %s)'],
+            params=[SEARCH_CONFIG, query],
+        )
+
+    def ranked(self, queryset, query):
+        # ts_rank возвращает real; курсор хранит float Python (double), и
+        # без приведения равенство в ветке «та же позиция» не сработало
+        # бы, а посты с равным рангом терялись или повторялись.
+        rank = RawSQL(
+            'ts_rank(search_vector, plainto_tsquery(%s::regconfig, %s))'
+            '::float8',
+            (SEARCH_CONFIG, query),
+            output_field=FloatField(),
+        )
+        return keyset(self.match(queryset, query), rank)
+
+    def index(self, post):
+        pass
+
+    def index_many(self, post_ids):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteSearch:
+    """FTS5-таблица posts_post_fts для локальной разработки и тестов."""
+
+    TABLE = 'posts_post_fts'
+
+    @staticmethod
+    def _fts_query(query):
+        return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+    def match(self, queryset, query):
+        return queryset.extra(
+            where=[f'posts_post.id IN (SELECT rowid FROM {self.TABLE} '
+                   f'WHERE {self.TABLE} MATCH %s)'],
+            params=[self._fts_query(query)],
+        )
+
+    def ranked(self, queryset, query):
+        rank = RawSQL(
+            f'SELECT -bm25({self.TABLE}) FROM {self.TABLE} '
+            f'WHERE {self.TABLE} MATCH %s AND rowid = posts_post.id',
+            (self._fts_query(query),),
+            output_field=FloatField(),
+        )
+        return keyset(self.match(queryset, query), rank)
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            self._delete(cursor, post.pk)
+            cursor.execute(
+                f'INSERT INTO {self.TABLE} (rowid, text) VALUES (%s, %s)',
+                (post.pk, post.text),
+            )
+
+    def index_many(self, post_ids):
+        """Переиндексирует посты пачками, например после загрузки."""
+        post_ids = list(post_ids)
+        with connection.cursor() as cursor:
+            for start in range(0, len(post_ids), FEED_BATCH_SIZE):
+                batch = post_ids[start:start + FEED_BATCH_SIZE]
+                marks = ', '.join(['%s'] * len(batch))
+                cursor.execute(
+                    f'DELETE FROM {self.TABLE} WHERE rowid IN ({marks})',
+                    batch)
+                cursor.execute(
+                    f'INSERT INTO {self.TABLE} (rowid, text) '
+                    f'SELECT id, text FROM posts_post WHERE id IN ({marks})',
+                    batch)
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            self._delete(cursor, post_id)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.TABLE}')
+            cursor.execute(
+                f'INSERT INTO {self.TABLE} (rowid, text) '
+                f'SELECT id, text FROM posts_post'
+            )
+
+    def _delete(self, cursor, post_id):
+        cursor.execute(
+            f'DELETE FROM {self.TABLE} WHERE rowid = %s', (post_id,))
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearch()
+    return SQLiteSearch()
+
+
+def search_posts(query, queryset=None):
+    """Посты, подходящие под запрос, размеченные рангом для пагинации."""
+    if queryset is None:
+        queryset = Post.objects.for_listing()
+    if not re.search(r'\w', query):
+        return keyset(queryset.none())
+    return get_backend().ranked(queryset, query).order_by(
+        '-cursor_value', '-cursor_pk')
@@ -0,0 +1,151 @@
+import io
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import feed, trending
+from .counters import iter_user_batches, reconcile
+from .models import Comment, Follow, Group, Post
+from .search import get_backend
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса степенного распределения для random.choices.
+
+    Первый элемент самый популярный. Накопленные веса считаются один раз:
+    с обычными weights choices пересчитывает их на каждом вызове.
+    """
+    return list(itertools.accumulate(
+        1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+def sample_unique(rng, population, cum_weights, k):
+    """k разных элементов population с учётом накопленных весов."""
+    k = min(k, len(population))
+    chosen = set()
+    while len(chosen) < k:
+        chosen.update(rng.choices(population, cum_weights=cum_weights,
+                                  k=k - len(chosen)))
+    return chosen
+
+
+def make_image(rng, size=(64, 48)):
+    color = tuple(rng.randrange(256) for _ in range(3))
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@transaction.atomic
+def seed_dataset(users=100, posts=1000, groups=10, follows=10,
+                 comments=2000, images=20, days=365, seed=0):
+    """Заполняет базу воспроизводимым набором данных.
+
+    Число подписок на автора и число постов автора подчиняются
+    степенному закону: несколько «звёзд» и длинный хвост. follows —
+    среднее число подписок на пользователя. Строки вставляются пачками
+    в обход сигналов, поэтому ленты, счётчики и поисковый индекс
+    пересобираются в конце.
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    now = timezone.now()
+
+    def moment():
+        return now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+
+    password = make_password(None)
+    User.objects.bulk_create(
+        [User(username=f'bench_user_{i}', password=password,
+              first_name=fake.first_name(), last_name=fake.last_name())
+         for i in range(users)],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_user_').order_by('pk').values_list(
+            'pk', flat=True))
+    popularity = zipf_weights(len(user_ids))
+
+    Group.objects.bulk_create(
+        [Group(title=fake.sentence(nb_words=3)[:200],
+               slug=f'bench-group-{i}',
+               description=fake.paragraph())
+         for i in range(groups)],
+        batch_size=BATCH_SIZE,
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-').order_by('pk').values_list(
+            'pk', flat=True))
+
+    follow_rows = []
+    ranks = range(len(user_ids))
+    for rank, user_id in enumerate(user_ids):
+        count = min(int(rng.paretovariate(1.5) * follows / 3),
+                    len(user_ids) - 1)
+        authors = sample_unique(rng, ranks, popularity, count + 1)
+        authors.discard(rank)
+        follow_rows.extend(
+            Follow(user_id=user_id, author_id=user_ids[author])
+            for author in sorted(authors)[:count]
+        )
+    Follow.objects.bulk_create(
+        follow_rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    Post.objects.bulk_create(
+        [Post(text=fake.paragraph(nb_sentences=5),
+              author_id=rng.choices(user_ids, cum_weights=popularity)[0],
+              group_id=(rng.choice(group_ids)
+                        if group_ids and rng.random() < 0.7 else None),
+              pub_date=moment())
+         for _ in range(posts)],
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(Post.objects.filter(
+        author_id__in=user_ids).order_by('pk').values_list('pk', flat=True))
+
+    if post_ids:
+        post_weights = zipf_weights(len(post_ids))
+        rng.shuffle(post_ids)
+        commented = rng.choices(post_ids, cum_weights=post_weights,
+                                k=comments)
+        Comment.objects.bulk_create(
+            [Comment(post_id=post_id,
+                     author_id=rng.choice(user_ids),
+                     text=fake.sentence(),
+                     created=moment())
+             for post_id in commented],
+            batch_size=BATCH_SIZE,
+        )
+        for post_id in post_ids[:images]:
+            post = Post.objects.get(pk=post_id)
+            post.image.save(f'bench_{post_id}.png',
+                            ContentFile(make_image(rng)), save=False)
+            Post.objects.filter(pk=post_id).update(
+                image=post.image.name, updated_at=timezone.now())
+
+    for batch in iter_user_batches(BATCH_SIZE):
+        reconcile(batch)
+    feed.rebuild()
+    get_backend().rebuild()
+    trending.rebuild()
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'follows': len(follow_rows),
+        'posts': len(post_ids),
+        'comments': comments if post_ids else 0,
+        'images': min(images, len(post_ids)),
+    }
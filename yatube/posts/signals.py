@@ -0,0 +1,90 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, counters, feed, search, thumbnails, trending
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(instance.author_id, posts_count=1)
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    if raw or update_fields is not None and 'image' not in update_fields:
+        return
+    name = instance.image.name
+    if name and name != instance.loaded_image:
+        thumbnails.schedule(name)
+    instance.loaded_image = name
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(instance.author_id, followers_count=1)
+        counters.change(instance.user_id, following_count=1)
+        feed.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change(instance.author_id, followers_count=-1)
+    counters.change(instance.user_id, following_count=-1)
+    feed.unfollowed(instance.user, instance.author)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.record_comment(instance.post_id, instance.created)
+
+
+def bump_listing_generation(sender, **kwargs):
+    caching.bump_generation()
+
+
+# Поля пользователя, которые видны на страницах постов.
+DISPLAYED_USER_FIELDS = frozenset(('username', 'first_name', 'last_name'))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, raw=False, update_fields=None,
+                 **kwargs):
+    # Вход сохраняет только last_login и страниц не меняет.
+    if created or raw:
+        return
+    if update_fields is None or DISPLAYED_USER_FIELDS & set(update_fields):
+        caching.bump_generation()
+
+
+for model in (Post, Group, Comment, Follow):
+    post_save.connect(bump_listing_generation, sender=model)
+    post_delete.connect(bump_listing_generation, sender=model)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.caching import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, **flags):
+    """{% post_cards page_obj profile=True as cards %}: пары (пост, HTML)."""
+    return render_cards(posts, **flags)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.caching import response_key
+from posts.models import Post, User
+
+
+class AnonymousCacheTests(TestCase):
+    """Тестирует кэш целых ответов для анонимных посетителей"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AUTHOR = 'auth'
+        cls.POST_TEXT = 'Тестовый текст'
+        cls.NEW_TEXT = 'Свежий пост'
+        cls.INDEX_URL = reverse('posts:index')
+        cls.author = User.objects.create_user(username=cls.AUTHOR)
+        Post.objects.create(text=cls.POST_TEXT, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_guest_hit(self):
+        """Повторный анонимный запрос отдаётся из кэша без базы"""
+        content = self.guest_client.get(self.INDEX_URL).content
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.INDEX_URL)
+        self.assertEqual(response.content, content)
+
+    def test_bypass(self):
+        """Пользователь и запрос с CSRF-кукой кэш не используют"""
+        self.guest_client.get(self.INDEX_URL)
+        cookie_client = Client()
+        cookie_client.cookies[settings.CSRF_COOKIE_NAME] = 'token'
+        for client in (self.author_client, cookie_client):
+            with self.subTest(client=client):
+                client.get(self.INDEX_URL)
+                self.assertIsNotNone(client.get(self.INDEX_URL).context)
+
+    def test_stale_while_revalidate(self):
+        """Пока запись перестраивается, остальным отдаётся старая версия"""
+        self.guest_client.get(self.INDEX_URL)
+        Post.objects.create(text=self.NEW_TEXT, author=self.author)
+        cache.add(response_key(self.INDEX_URL) + ':lock', 1)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.INDEX_URL)
+        self.assertNotContains(response, self.NEW_TEXT)
+        cache.delete(response_key(self.INDEX_URL) + ':lock')
+        self.assertContains(self.guest_client.get(self.INDEX_URL),
+                            self.NEW_TEXT)
+
+    @mock.patch('posts.caching.ANONYMOUS_CACHE_TIMEOUT', 0)
+    def test_expired_entry_rebuilt(self):
+        """Запись с истёкшим сроком перестраивается первым запросом"""
+        self.guest_client.get(self.INDEX_URL)
+        self.assertIsNotNone(self.guest_client.get(self.INDEX_URL).context)
+
+    @mock.patch('posts.caching.ANONYMOUS_CACHE_WAIT', 0)
+    def test_locked_miss_renders(self):
+        """Без записи и при чужой блокировке страница всё равно отдаётся"""
+        cache.add(response_key(self.INDEX_URL) + ':lock', 1)
+        self.assertContains(self.guest_client.get(self.INDEX_URL),
+                            self.POST_TEXT)
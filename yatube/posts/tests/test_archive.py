@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.config import POSTS_PER_PAGE
+from posts.counters import reconcile
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Post,
+                          User, UserStats)
+
+
+class ArchiveTests(TestCase):
+    """Тестирует перенос старых постов в архив и чтение из него"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AUTHOR = 'auth'
+        cls.OLD_COUNT = 3
+        cls.author = User.objects.create_user(username=cls.AUTHOR)
+        old = timezone.now() - timedelta(days=100)
+        cls.old_posts = [Post.objects.create(
+            text=f'Старый пост {i}', author=cls.author,
+            pub_date=old + timedelta(minutes=i),
+        ) for i in range(cls.OLD_COUNT)]
+        cls.comment = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.author,
+            text='Старый комментарий')
+        cls.new_posts = [Post.objects.create(
+            text=f'Новый пост {i}', author=cls.author)
+            for i in range(POSTS_PER_PAGE + 1)]
+        cls.PROFILE_URL = reverse('posts:profile',
+                                  kwargs={'username': cls.AUTHOR})
+        cls.DETAIL_URL = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.old_posts[0].pk})
+
+    def setUp(self):
+        cache.clear()
+        call_command('archive_posts', '--days=30', '--batch-size=2',
+                     stdout=StringIO())
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_old_posts_moved(self):
+        """Старые посты и их комментарии переезжают в архив с теми же id"""
+        old_ids = {post.pk for post in self.old_posts}
+        self.assertFalse(Post.objects.filter(pk__in=old_ids).exists())
+        self.assertEqual(set(ArchivedPost.objects.values_list(
+            'pk', flat=True)), old_ids)
+        self.assertEqual(Post.objects.count(), len(self.new_posts))
+        self.assertTrue(ArchivedComment.objects.filter(
+            pk=self.comment.pk, post_id=self.old_posts[0].pk).exists())
+
+    def test_post_count_includes_archive(self):
+        """Счётчик постов автора учитывает архив"""
+        reconcile([self.author.pk])
+        self.assertEqual(UserStats.objects.get(user=self.author).posts_count,
+                         len(self.new_posts) + self.OLD_COUNT)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старому адресу без формы и правки"""
+        response = self.client.get(self.DETAIL_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['post'].is_archived)
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(response, reverse(
+            'posts:post_edit', kwargs={'post_id': self.old_posts[0].pk}))
+        self.assertNotContains(response, reverse(
+            'posts:add_comment', kwargs={'post_id': self.old_posts[0].pk}))
+
+    def test_missing_post_404(self):
+        """Пост, которого нет ни в одной таблице, отдаёт 404"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_first_page_skips_archive(self):
+        """Полная первая страница профиля не читает архив"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.PROFILE_URL)
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+        self.assertFalse(any('posts_archivedpost' in query['sql']
+                             for query in queries))
+
+    def test_profile_deep_page_reads_archive(self):
+        """Следующая страница профиля продолжается архивными постами"""
+        page = self.client.get(self.PROFILE_URL).context['page_obj']
+        response = self.client.get(
+            self.PROFILE_URL + '?after=' + page.next_cursor)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.new_posts[0].pk]
+            + [post.pk for post in reversed(self.old_posts)])
+        back = self.client.get(
+            self.PROFILE_URL + '?before='
+            + response.context['page_obj'].previous_cursor)
+        self.assertEqual([post.pk for post in back.context['page_obj']],
+                         [post.pk for post in page])
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import FeedEntry, Follow, Group, Post, User, UserStats
+from posts.seed import seed_dataset
+from posts.search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchTests(TestCase):
+    """Тестирует наполнение базы и команду замеров"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_dataset(self):
+        """Набор данных создаётся целиком, производные таблицы собраны"""
+        dataset = seed_dataset(users=20, posts=100, groups=3, follows=5,
+                               comments=50, images=2, seed=1)
+        self.assertEqual(dataset['posts'], Post.objects.count())
+        self.assertEqual(Post.objects.exclude(image='').count(), 2)
+        self.assertEqual(UserStats.objects.count(), 20)
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)),
+            100)
+        self.assertEqual(
+            FeedEntry.objects.count(),
+            Post.objects.filter(author__following__isnull=False).count())
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(search_posts(word).exists())
+
+    def test_seed_is_reproducible(self):
+        """Один и тот же seed даёт одинаковые данные"""
+        def snapshot():
+            seed_dataset(users=10, posts=30, groups=2, comments=10,
+                         images=0, seed=7)
+            return (
+                list(Post.objects.order_by('pk').values_list(
+                    'text', 'author__username', 'group__slug')),
+                sorted(Follow.objects.values_list(
+                    'user__username', 'author__username')),
+            )
+
+        first = snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertEqual(snapshot(), first)
+
+    def test_bench_writes_results(self):
+        """Команда замеряет все страницы и пишет результаты в JSON"""
+        output = os.path.join(TEMP_MEDIA_ROOT, 'bench.json')
+        call_command(
+            'bench', '--no-isolate', '--users=10', '--posts=40',
+            '--groups=2', '--comments=20', '--images=1',
+            '--iterations=2', '--warmup=0', '--depth=1',
+            f'--output={output}', stdout=StringIO())
+        with open(output, encoding='utf-8') as results:
+            routes = json.load(results)['routes']
+        for name in ('index', 'index_deep', 'follow_index', 'post_detail',
+                     'post_create', 'post_delete', 'search_api'):
+            with self.subTest(route=name):
+                self.assertIn(name, routes)
+                self.assertLessEqual(routes[name]['p50_ms'],
+                                     routes[name]['p99_ms'])
+                self.assertLess(max(routes[name]['status']), 400)
+
+    def test_bench_leaves_site_cache(self):
+        """Замеры не очищают кэш сайта и не пишут в него"""
+        output = os.path.join(TEMP_MEDIA_ROOT, 'bench-cache.json')
+        cache.clear()
+        cache.set('bench:marker', 'live')
+        call_command(
+            'bench', '--no-isolate', '--users=5', '--posts=10',
+            '--groups=1', '--comments=5', '--images=0',
+            '--iterations=1', '--warmup=0', '--depth=1',
+            f'--output={output}', stdout=StringIO())
+        self.assertEqual(cache.get('bench:marker'), 'live')
+        self.assertIsNone(cache.get('posts:generation'))
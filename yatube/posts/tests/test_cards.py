@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import caching
+from posts.config import POSTS_PER_PAGE
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    """Тестирует кэширование карточек постов по одной"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.posts = [Post.objects.create(
+            text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(POSTS_PER_PAGE)]
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def rendered_cards(self, url):
+        """Сколько карточек отрисовано заново при новом поколении лент."""
+        caching.bump_generation()
+        with mock.patch('posts.caching.render_to_string',
+                        wraps=caching.render_to_string) as render:
+            response = self.client.get(url)
+        return response, render.call_count
+
+    def test_cards_reused(self):
+        """Новое поколение лент не перерисовывает карточки"""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                _, first = self.rendered_cards(url)
+                _, second = self.rendered_cards(url)
+                self.assertEqual(first, POSTS_PER_PAGE)
+                self.assertEqual(second, 0)
+
+    def test_single_get_many(self):
+        """Карточки страницы читаются одним get_many"""
+        self.client.get(self.URLS[0])
+        caching.bump_generation()
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many:
+            self.client.get(self.URLS[0])
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(len(get_many.call_args[0][0]), POSTS_PER_PAGE)
+
+    def test_edit_invalidates_own_card(self):
+        """Правка поста перерисовывает только его карточку"""
+        self.rendered_cards(self.URLS[0])
+        post = self.posts[0]
+        post.text = 'Новый текст'
+        post.save()
+        response, rendered = self.rendered_cards(self.URLS[0])
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Новый текст')
+
+    def test_author_name_in_key(self):
+        """Новое имя автора попадает в карточки без правки постов"""
+        self.rendered_cards(self.URLS[0])
+        self.author.first_name = 'Иван'
+        self.author.save()
+        response, _ = self.rendered_cards(self.URLS[0])
+        self.assertContains(response, 'Иван')
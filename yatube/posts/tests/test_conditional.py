@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    """Тестирует ответы 304 на условные GET страниц"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AUTHOR = 'auth'
+        cls.READER = 'reader'
+        cls.GROUP_SLUG = 'test-slug'
+        cls.author = User.objects.create_user(username=cls.AUTHOR)
+        cls.reader = User.objects.create_user(username=cls.READER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=cls.GROUP_SLUG,
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.PROFILE_URL = reverse('posts:profile',
+                                  kwargs={'username': cls.AUTHOR})
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.GROUP_SLUG}),
+            cls.PROFILE_URL,
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без запросов к базе"""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_etag_changes_with_content(self):
+        """Новый пост делает старые ETag недействительными"""
+        etags = [self.guest_client.get(url)['ETag'] for url in self.URLS]
+        Post.objects.create(text='Новый пост', author=self.author,
+                            group=self.group)
+        for url, etag in zip(self.URLS, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_author_name(self):
+        """Смена имени автора делает старые ETag недействительными"""
+        etags = [self.guest_client.get(url)['ETag'] for url in self.URLS]
+        self.author.first_name = 'Лев'
+        self.author.save()
+        for url, etag in zip(self.URLS, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Лев')
+
+    def test_login_keeps_etag(self):
+        """Вход пользователя не сбрасывает ETag страниц"""
+        self.reader.set_password('password')
+        self.reader.save(update_fields=['password'])
+        etag = self.guest_client.get(self.URLS[0])['ETag']
+        self.assertTrue(Client().login(username=self.READER,
+                                       password='password'))
+        response = self.guest_client.get(self.URLS[0],
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и пользователь получают разные ETag"""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag профиля с кнопкой подписки"""
+        etag = self.reader_client.get(self.PROFILE_URL)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            self.PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
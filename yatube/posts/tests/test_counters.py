@@ -0,0 +1,92 @@
+import importlib
+from io import StringIO
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Follow, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    """Тестирует денормализованные счётчики постов и подписок"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AUTHOR = 'auth'
+        cls.FOLLOWER = 'follower'
+        cls.POST_TEXT = 'Тестовый текст'
+        cls.author = User.objects.create_user(username=cls.AUTHOR)
+        cls.follower = User.objects.create_user(username=cls.FOLLOWER)
+        cls.PROFILE_URL = reverse('posts:profile',
+                                  kwargs={'username': cls.AUTHOR})
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(user=user, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_post_counters(self):
+        """Создание и удаление поста меняют счётчик постов"""
+        post = Post.objects.create(text=self.POST_TEXT, author=self.author)
+        Post.objects.create(text=self.POST_TEXT, author=self.author)
+        self.assertStats(self.author, posts_count=2)
+        post.delete()
+        self.assertStats(self.author, posts_count=1)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обеих сторон"""
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertStats(self.author, followers_count=1, following_count=0)
+        self.assertStats(self.follower, followers_count=0, following_count=1)
+        follow.delete()
+        self.assertStats(self.author, followers_count=0)
+        self.assertStats(self.follower, following_count=0)
+
+    def test_profile_reads_stored_counters(self):
+        """Профиль показывает сохранённые счётчики"""
+        Post.objects.create(text=self.POST_TEXT, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        stats = Client().get(self.PROFILE_URL).context['stats']
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(stats.following_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters исправляет расхождения"""
+        Post.objects.create(text=self.POST_TEXT, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.filter(user=self.author).update(
+            posts_count=10, followers_count=10)
+        UserStats.objects.filter(user=self.follower).delete()
+        out = StringIO()
+        call_command('reconcile_counters', batch_size=1, stdout=out)
+        self.assertIn('исправлено: 2', out.getvalue())
+        self.assertStats(self.author, posts_count=1, followers_count=1)
+        self.assertStats(self.follower, following_count=1)
+
+    def test_decrement_not_below_zero(self):
+        """Разошедшийся счётчик при уменьшении останавливается на нуле"""
+        UserStats.objects.filter(user=self.author).update(followers_count=0)
+        counters.change(self.author.pk, followers_count=-1, posts_count=1)
+        self.assertStats(self.author, followers_count=0, posts_count=1)
+
+    def test_backfill_migration(self):
+        """Миграция создаёт статистику существующим пользователям"""
+        Post.objects.create(text=self.POST_TEXT, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.all().delete()
+        migration = importlib.import_module(
+            'posts.migrations.0020_backfill_userstats')
+        with connection.cursor() as cursor:
+            migration.backfill_userstats(apps, SimpleNamespace(
+                execute=cursor.execute, quote_name=connection.ops.quote_name))
+        self.assertStats(self.author, posts_count=1, followers_count=1,
+                         following_count=0)
+        self.assertStats(self.follower, posts_count=0, following_count=1)
@@ -0,0 +1,77 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginators import encode_cursor
+from posts.seed import seed_dataset
+
+
+class ExplainTests(TestCase):
+    """Проверяет планы запросов страниц на наборе данных bench"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed_dataset(users=30, posts=600, groups=3, follows=8,
+                     comments=600, images=0, seed=0)
+        cls.author = User.objects.filter(
+            username__startswith='bench_user_').order_by('pk').first()
+        cls.reader = Follow.objects.order_by('pk').first().user
+        cls.group = Group.objects.order_by('pk').first()
+        cls.post = Comment.objects.order_by('pk').first().post
+        cls.URLS = {
+            'index': reverse('posts:index'),
+            'group_list': reverse('posts:group_list',
+                                  kwargs={'slug': cls.group.slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': cls.author.username}),
+            'post_detail': reverse('posts:post_detail',
+                                   kwargs={'post_id': cls.post.pk}),
+            'follow_index': reverse('posts:follow_index'),
+            'trending': reverse('posts:trending'),
+        }
+        middle = Post.objects.filter(group=cls.group).order_by(
+            '-pub_date', '-pk')[20]
+        cursor = '?after=' + encode_cursor((middle.pub_date, middle.pk))
+        for name in ('index', 'group_list', 'profile'):
+            cls.URLS[f'{name}_deep'] = cls.URLS[name] + cursor
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def explain(self, sql):
+        if connection.vendor == 'postgresql':
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertIndexedPlan(self, plan):
+        if connection.vendor == 'postgresql':
+            self.assertNotRegex(plan, r'(^|->\s+)(Incremental )?Sort\b')
+            self.assertNotIn('Seq Scan', plan)
+            return
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotRegex(plan, re.compile(r'SCAN (TABLE )?\w+$', re.M))
+
+    def test_listing_queries_use_indexes(self):
+        """Запросы страниц идут по индексам и без сортировки"""
+        for name, url in self.URLS.items():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            for query in queries:
+                if 'posts_' not in query['sql']:
+                    continue
+                plan = self.explain(query['sql'])
+                with self.subTest(page=name, sql=query['sql']):
+                    self.assertIndexedPlan(plan)
@@ -1,7 +1,14 @@
+import importlib
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core import serializers
+from django.db import connection
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Post, User, Follow
+from posts.models import FeedEntry, Post, User, Follow, UserStats
 
 
 class FormsTests(TestCase):
@@ -60,3 +67,81 @@ class FormsTests(TestCase):
                 author=self.poster
             ).exists()
         )
+
+    def test_feed_fan_out(self):
+        """Новый пост попадает в материализованную ленту подписчика"""
+        self.new_follower_client.get(self.FOLLOW_URL)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.new_follower, post=self.post).exists())
+        post = Post.objects.create(text=self.POST_TEXT, author=self.poster)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.new_follower, post=post).exists())
+        response = self.new_follower_client.get(self.FOLLOW_INDEX_URL)
+        self.assertEqual(list(response.context['page_obj']),
+                         [post, self.post])
+        self.assertNotIn(post, self.unfollower_client.get(
+            self.FOLLOW_INDEX_URL).context['page_obj'])
+
+    def test_feed_prune(self):
+        """Отписка убирает посты автора из ленты"""
+        self.new_follower_client.get(self.FOLLOW_URL)
+        self.new_follower_client.get(self.UNFOLLOW_URL)
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.new_follower).exists())
+        response = self.new_follower_client.get(self.FOLLOW_INDEX_URL)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_feed_heavy_author_merged_on_read(self):
+        """Посты популярного автора подмешиваются при чтении ленты"""
+        with mock.patch('posts.feed.FEED_FANOUT_LIMIT', 1):
+            self.new_follower_client.get(self.FOLLOW_URL)
+            post = Post.objects.create(text=self.POST_TEXT,
+                                       author=self.poster)
+            self.assertFalse(FeedEntry.objects.filter(
+                user=self.new_follower).exists())
+            response = self.new_follower_client.get(self.FOLLOW_INDEX_URL)
+        self.assertEqual(list(response.context['page_obj']),
+                         [post, self.post])
+
+    def test_feed_refilled_below_limit(self):
+        """Автор, опустившийся ниже порога, раскладывается по лентам"""
+        with mock.patch('posts.feed.FEED_FANOUT_LIMIT', 2):
+            self.new_follower_client.get(self.FOLLOW_URL)
+            self.unfollower_client.get(self.FOLLOW_URL)
+            post = Post.objects.create(text=self.POST_TEXT,
+                                       author=self.poster)
+            self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+            self.unfollower_client.get(self.UNFOLLOW_URL)
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user', 'post')),
+            {(self.new_follower.pk, post.pk),
+             (self.new_follower.pk, self.post.pk)})
+
+    def test_raw_save_skips_fan_out(self):
+        """Загрузка фикстур не раскладывает посты и не трогает счётчики"""
+        Follow.objects.create(user=self.new_follower, author=self.poster)
+        posts_count = UserStats.objects.get(user=self.poster).posts_count
+        post = Post(pk=10_000, text=self.POST_TEXT, author=self.poster,
+                    updated_at=timezone.now())
+        follow = Follow(user=self.unfollower, author=self.poster)
+        for obj in serializers.deserialize(
+                'json', serializers.serialize('json', [post, follow])):
+            obj.save()
+        self.assertFalse(FeedEntry.objects.filter(post_id=10_000).exists())
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.unfollower).exists())
+        self.assertEqual(UserStats.objects.get(user=self.poster).posts_count,
+                         posts_count)
+
+    def test_backfill_migration(self):
+        """Миграция заполняет ленты по существующим подпискам"""
+        Follow.objects.create(user=self.new_follower, author=self.poster)
+        FeedEntry.objects.all().delete()
+        migration = importlib.import_module(
+            'posts.migrations.0019_backfill_feed')
+        with connection.cursor() as cursor:
+            migration.backfill_feed(None, SimpleNamespace(
+                execute=cursor.execute))
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.new_follower.pk, self.post.pk)])
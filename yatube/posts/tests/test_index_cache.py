@@ -1,8 +1,10 @@
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.core.cache import cache
+from django.utils import timezone
 
-from posts.models import Post, User
+from posts.config import POSTS_PER_PAGE
+from posts.models import Comment, Group, Post, User
 
 
 class TaskPagesTests(TestCase):
@@ -11,22 +13,75 @@ class TaskPagesTests(TestCase):
         super().setUpClass()
         cls.AUTHOR = 'auth'
         cls.POST_TEXT = 'Тестовый текст'
+        cls.NEW_TEXT = 'Изменённый текст'
+        cls.GROUP_SLUG = 'test-slug'
         cls.INDEX_URL = reverse('posts:index')
+        cls.GROUP_LIST_URL = reverse('posts:group_list',
+                                     kwargs={'slug': cls.GROUP_SLUG})
+        cls.PROFILE_URL = reverse('posts:profile',
+                                  kwargs={'username': cls.AUTHOR})
         cls.author = User.objects.create_user(username=cls.AUTHOR)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=cls.GROUP_SLUG,
+        )
         cls.post = Post.objects.create(
             text=cls.POST_TEXT,
             author=cls.author,
+            group=cls.group,
         )
 
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(self.author)
 
     def test_index_cache(self):
+        """Без сигналов об изменениях отдаётся закэшированная лента"""
         content_one = self.author_client.get(self.INDEX_URL).content
-        self.post.delete()
+        Post.objects.filter(pk=self.post.pk).update(text=self.NEW_TEXT)
         content_two = self.author_client.get(self.INDEX_URL).content
         self.assertEqual(content_one, content_two)
         cache.clear()
         content_three = self.author_client.get(self.INDEX_URL).content
         self.assertNotEqual(content_one, content_three)
+
+    def test_cache_invalidated_by_events(self):
+        """Изменения постов, групп и комментариев сбрасывают кэш лент"""
+        urls = (self.INDEX_URL, self.GROUP_LIST_URL, self.PROFILE_URL)
+        events = {
+            'post_create': lambda: Post.objects.create(
+                text=self.NEW_TEXT, author=self.author, group=self.group),
+            'post_edit': lambda: Post.objects.filter(
+                pk=self.post.pk).first().save(),
+            'group_edit': lambda: self.group.save(),
+            'comment_create': lambda: Comment.objects.create(
+                post=self.post, author=self.author, text=self.NEW_TEXT),
+            'post_delete': lambda: Post.objects.filter(
+                text=self.NEW_TEXT).first().delete(),
+        }
+        for event, action in events.items():
+            for url in urls:
+                with self.subTest(event=event, url=url):
+                    before = self.author_client.get(url).content
+                    Post.objects.filter(pk=self.post.pk).update(
+                        text=f'{self.NEW_TEXT} {event} {url}',
+                        updated_at=timezone.now())
+                    action()
+                    after = self.author_client.get(url).content
+                    self.assertNotEqual(before, after)
+
+    def test_pages_cached_separately(self):
+        """Каждая страница ленты кэшируется под своим ключом"""
+        Post.objects.bulk_create(
+            Post(text=self.POST_TEXT, author=self.author, group=self.group)
+            for _ in range(POSTS_PER_PAGE)
+        )
+        for url in (self.INDEX_URL, self.GROUP_LIST_URL, self.PROFILE_URL):
+            with self.subTest(url=url):
+                cache.clear()
+                first = self.author_client.get(url)
+                cursor = first.context['page_obj'].next_cursor
+                second = self.author_client.get(url, {'after': cursor})
+                self.assertEqual(len(second.context['page_obj']), 1)
+                self.assertNotEqual(first.content, second.content)
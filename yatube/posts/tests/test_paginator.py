@@ -1,4 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Post, User, Group
@@ -31,6 +34,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(bulk_posts)
 
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(self.author)
 
@@ -62,3 +66,28 @@ class PaginatorViewsTest(TestCase):
                     response_page_2.context['page_obj']),
                     second_page
                 )
+
+    def test_cursor_paginator(self):
+        """Курсоры ведут вперёд и назад без COUNT и OFFSET"""
+        url = reverse('posts:index')
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(url).context['page_obj']
+        self.assertFalse(any('COUNT(' in query['sql'].upper()
+                             for query in queries.captured_queries))
+        self.assertFalse(any('OFFSET' in query['sql'].upper()
+                             for query in queries.captured_queries))
+        self.assertEqual(list(first), expected[:POSTS_PER_PAGE])
+        self.assertFalse(first.has_previous())
+        second = self.client.get(
+            url, {'after': first.next_cursor}).context['page_obj']
+        self.assertEqual(list(second), expected[POSTS_PER_PAGE:])
+        self.assertFalse(second.has_next())
+        back = self.client.get(
+            url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), expected[:POSTS_PER_PAGE])
+
+    def test_cursor_paginator_bad_token(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.client.get(reverse('posts:index'), {'after': '!!'})
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
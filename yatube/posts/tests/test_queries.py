@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.config import POSTS_PER_PAGE
+from posts.models import Comment, Follow, Group, Post, User
+
+# Потолок запросов к базе на одну страницу: (гость, авторизованный).
+# Авторизованным профиль и лента подписок добавляют рекомендации.
+QUERY_BUDGETS = {
+    'index': (1, 3),
+    'group_list': (2, 4),
+    'profile': (3, 7),
+    'post_detail': (3, 5),
+    'follow_index': (None, 5),
+}
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов не растёт с числом постов на странице"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.GROUP_SLUG = 'test-slug'
+        cls.POST_TEXT = 'Тестовый текст'
+        cls.viewer = User.objects.create_user(username='viewer')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(POSTS_PER_PAGE)
+        ]
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'slug-{i}')
+            for i in range(POSTS_PER_PAGE)
+        ]
+        for author, group in zip(cls.authors, cls.groups):
+            Follow.objects.create(user=cls.viewer, author=author)
+            Post.objects.create(text=cls.POST_TEXT, author=author,
+                                group=group)
+        cls.group_author = cls.authors[0]
+        Post.objects.bulk_create(
+            Post(text=cls.POST_TEXT, author=cls.group_author,
+                 group=cls.groups[0])
+            for _ in range(POSTS_PER_PAGE)
+        )
+        cls.post = Post.objects.filter(author=cls.group_author).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text=cls.POST_TEXT)
+            for author in cls.authors
+        )
+        cls.URLS = {
+            'index': reverse('posts:index'),
+            'group_list': reverse('posts:group_list',
+                                  kwargs={'slug': cls.groups[0].slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': cls.group_author}),
+            'post_detail': reverse('posts:post_detail',
+                                   kwargs={'post_id': cls.post.pk}),
+            'follow_index': reverse('posts:follow_index'),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.viewer_client = Client()
+        self.viewer_client.force_login(self.viewer)
+
+    def assertMaxNumQueries(self, budget, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = func(*args, **kwargs)
+        executed = len(context.captured_queries)
+        self.assertLessEqual(
+            executed, budget,
+            f'{executed} запросов при бюджете {budget}:\n' + '\n'.join(
+                query['sql'] for query in context.captured_queries))
+        return response
+
+    def test_query_budgets(self):
+        """Страницы укладываются в бюджет запросов"""
+        for name, (guest_budget, user_budget) in QUERY_BUDGETS.items():
+            clients = ((self.client, guest_budget),
+                       (self.viewer_client, user_budget))
+            for client, budget in clients:
+                if budget is None:
+                    continue
+                with self.subTest(view=name, budget=budget):
+                    cache.clear()
+                    response = self.assertMaxNumQueries(
+                        budget, client.get, self.URLS[name])
+                    self.assertEqual(response.status_code, 200)
@@ -0,0 +1,85 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorRecommendation, Follow, User
+from posts.recommendations import rebuild
+
+
+class RecommendationTests(TestCase):
+    """Тестирует пересчёт и показ рекомендаций авторов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in ('a', 'b', 'c', 'x', 'y', 'z')}
+        for user, authors in (('a', 'xyc'), ('b', 'xyz'), ('c', 'x')):
+            for author in authors:
+                Follow.objects.create(user=cls.users[user],
+                                      author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+        call_command('recommend_authors', stdout=StringIO())
+
+    def recommended(self, name):
+        return list(AuthorRecommendation.objects.filter(
+            user=self.users[name]).order_by('-score').values_list(
+            'author__username', flat=True))
+
+    def test_ranked_by_co_follows(self):
+        """Авторы ранжируются по общим подписчикам с уже читаемыми"""
+        self.assertEqual(self.recommended('c'), ['y', 'z'])
+        self.assertEqual(self.recommended('a'), ['z'])
+
+    def test_followed_and_self_excluded(self):
+        """Подписки и сам пользователь в рекомендации не попадают"""
+        for name in ('a', 'b', 'c'):
+            with self.subTest(user=name):
+                recommended = self.recommended(name)
+                self.assertNotIn(name, recommended)
+                self.assertFalse(Follow.objects.filter(
+                    user=self.users[name],
+                    author__username__in=recommended).exists())
+
+    def test_batches_give_same_result(self):
+        """Размер пачки не влияет на результат"""
+        expected = set(AuthorRecommendation.objects.values_list(
+            'user', 'author'))
+        rebuild(batch_cells=1)
+        self.assertEqual(set(AuthorRecommendation.objects.values_list(
+            'user', 'author')), expected)
+
+    def test_shown_on_pages(self):
+        """Рекомендации видны в профиле и ленте подписок, кроме новых
+        подписок"""
+        client = Client()
+        client.force_login(self.users['c'])
+        profile = reverse('posts:profile', kwargs={'username': 'x'})
+        for url in (profile, reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(
+                    [item.author.username
+                     for item in response.context['suggestions']],
+                    ['y', 'z'])
+        Follow.objects.create(user=self.users['c'], author=self.users['y'])
+        response = client.get(profile)
+        self.assertEqual([item.author.username
+                          for item in response.context['suggestions']],
+                         ['z'])
+
+    def test_generation_bumped_after_commit(self):
+        """Поколение страниц меняется вне транзакции пересчёта"""
+        depth = len(connection.savepoint_ids)
+        with mock.patch('posts.recommendations.caching.bump_generation',
+                        side_effect=lambda: self.assertEqual(
+                            len(connection.savepoint_ids), depth)) as bump:
+            rebuild()
+        bump.assert_called_once_with()
@@ -6,6 +6,7 @@ from posts.urls import app_name
 USERNAME = 'username'
 GROUP_SLUG = 'slug'
 POST_ID = 1
+COMMENT_ID = 1
 
 
 class RoutesModelTest(TestCase):
@@ -20,6 +21,8 @@ class RoutesModelTest(TestCase):
             ['/create/', 'post_create', None],
             [f'/posts/{POST_ID}/edit/', 'post_edit', [POST_ID]],
             [f'/posts/{POST_ID}/comment', 'add_comment', [POST_ID]],
+            [f'/comments/{COMMENT_ID}/delete/', 'delete_comment',
+             [COMMENT_ID]],
             ['/follow/', 'follow_index', None],
             [f'/profile/{USERNAME}/follow/', 'profile_follow', [USERNAME]],
             [f'/profile/{USERNAME}/unfollow/', 'profile_unfollow', [USERNAME]]
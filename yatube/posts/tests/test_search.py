@@ -0,0 +1,79 @@
+from django.contrib.admin.sites import site
+from django.core import serializers
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.config import POSTS_PER_PAGE
+from posts.models import Post, User
+from posts.search import search_posts
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.SEARCH_URL = reverse('posts:search')
+        cls.SEARCH_API_URL = reverse('posts:search_api')
+        cls.cats = Post.objects.create(
+            text='Коты спят. Коты едят. Коты играют.', author=cls.author)
+        cls.cat = Post.objects.create(
+            text='Коты и собаки гуляют вместе', author=cls.author)
+        cls.dogs = Post.objects.create(
+            text='Собаки лают', author=cls.author)
+        for _ in range(5):
+            Post.objects.create(text='Погода сегодня хорошая',
+                                author=cls.author)
+
+    def test_search_ranked(self):
+        """Поиск находит посты по словам и ранжирует их"""
+        self.assertEqual(list(search_posts('коты')), [self.cats, self.cat])
+        self.assertEqual(list(search_posts('коты собаки')), [self.cat])
+        self.assertEqual(list(search_posts('...')), [])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при сохранении и удалении поста"""
+        dogs = Post.objects.get(pk=self.dogs.pk)
+        dogs.text = 'Коты лают'
+        dogs.save()
+        self.assertIn(dogs, search_posts('коты'))
+        self.assertNotIn(dogs, search_posts('собаки'))
+        Post.objects.get(pk=self.cats.pk).delete()
+        self.assertNotIn(self.cats, search_posts('коты'))
+
+    def test_raw_save_not_indexed(self):
+        """Загрузка фикстур не индексирует посты по одному"""
+        post = Post(pk=10_000, text='Фикстурные коты', author=self.author,
+                    updated_at=timezone.now())
+        for obj in serializers.deserialize(
+                'json', serializers.serialize('json', [post])):
+            obj.save()
+        self.assertNotIn(post, search_posts('фикстурные'))
+
+    def test_search_view_paginated(self):
+        """Страница поиска листается курсором"""
+        for _ in range(POSTS_PER_PAGE + 2):
+            Post.objects.create(text='Птицы поют', author=self.author)
+        client = Client()
+        first = client.get(self.SEARCH_URL, {'q': 'птицы'})
+        self.assertEqual(len(first.context['page_obj']), POSTS_PER_PAGE)
+        cursor = first.context['page_obj'].next_cursor
+        self.assertContains(first, f'q=%D0%BF%D1%82%D0%B8%D1%86%D1%8B&amp;'
+                                   f'after={cursor}')
+        second = client.get(self.SEARCH_URL, {'q': 'птицы', 'after': cursor})
+        self.assertEqual(len(second.context['page_obj']), 2)
+
+    def test_search_api(self):
+        """API поиска отдаёт результаты в JSON"""
+        data = Client().get(self.SEARCH_API_URL, {'q': 'собаки'}).json()
+        self.assertEqual([result['id'] for result in data['results']],
+                         [self.dogs.pk, self.cat.pk])
+        self.assertIsNone(data['next'])
+
+    def test_admin_search(self):
+        """Поиск в админке использует тот же индекс"""
+        request = RequestFactory().get('/')
+        queryset, use_distinct = site._registry[Post].get_search_results(
+            request, Post.objects.all(), 'лают')
+        self.assertEqual(list(queryset), [self.dogs])
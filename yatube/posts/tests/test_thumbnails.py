@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails, workers
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=cls.small_gif,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @mock.patch('posts.workers.WORKER_PROCESSES', 0)
+    def test_warm_thumbnails(self):
+        """warm_thumbnails заполняет KV-хранилище миниатюр"""
+        source = ImageFile(self.post.image.name)
+        default.kvstore.delete_thumbnails(source)
+        out = StringIO()
+        call_command('warm_thumbnails', stdout=out)
+        self.assertIn('Картинок обработано: 1, с ошибками: 0',
+                      out.getvalue())
+        self.assertTrue(
+            default.kvstore._get(source.key, identity='thumbnails'))
+
+    @mock.patch('posts.thumbnails.schedule')
+    def test_schedule_only_when_image_changes(self, schedule):
+        """Миниатюры ставятся в очередь только при смене картинки"""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        schedule.assert_not_called()
+        post.image = SimpleUploadedFile(
+            name='other.gif', content=self.small_gif,
+            content_type='image/gif')
+        post.save()
+        schedule.assert_called_once_with(post.image.name)
+
+    def test_submit_failure_logged(self):
+        """Ошибка постановки в очередь после коммита только пишется в лог"""
+        with mock.patch('posts.workers.submit',
+                        side_effect=RuntimeError('пул недоступен')), \
+                self.assertLogs('posts.thumbnails', 'ERROR'):
+            thumbnails._submit(self.post.image.name)
+
+    def test_broken_pool_replaced(self):
+        """Сломанный пул процессов заменяется новым"""
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool()
+        with mock.patch('posts.workers.WORKER_PROCESSES', 1), \
+                mock.patch('posts.workers._pool', broken), \
+                mock.patch('posts.workers.ProcessPoolExecutor') as executor, \
+                self.assertLogs('posts.workers', 'WARNING'):
+            workers.submit(len, 'ab')
+            self.assertIs(workers._pool, executor.return_value)
+        broken.shutdown.assert_called_once_with(wait=False)
+        executor.return_value.submit.assert_called_once_with(len, 'ab')
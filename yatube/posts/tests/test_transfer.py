@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import (
+    Comment, FeedEntry, Follow, Group, Post, User, UserStats
+)
+from posts.search import search_posts
+from posts.transfer import Touched, finish_import, rebuild_touched
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class TransferTests(TestCase):
+    """Тестирует выгрузку и загрузку постов, комментариев и подписок"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AUTHOR = 'auth'
+        cls.READER = 'reader'
+        cls.GROUP_SLUG = 'test-slug'
+        cls.POST_TEXT = 'Архивный пост'
+        author = User.objects.create_user(username=cls.AUTHOR)
+        reader = User.objects.create_user(username=cls.READER)
+        group = Group.objects.create(title='Группа', slug=cls.GROUP_SLUG,
+                                     description='Описание')
+        for i in range(5):
+            post = Post.objects.create(text=f'{cls.POST_TEXT} {i}',
+                                       author=author,
+                                       group=group if i % 2 else None)
+            Comment.objects.create(post=post, author=reader, text='Ответ')
+        Follow.objects.create(user=reader, author=author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(TEMP_DIR, name)
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'pub_date', 'author__username', 'group__slug')),
+            list(Comment.objects.order_by('pk').values_list(
+                'pk', 'post_id', 'author__username', 'text', 'created')),
+            list(Follow.objects.order_by('pk').values_list(
+                'user__username', 'author__username')),
+        )
+
+    def wipe(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка и загрузка JSONL восстанавливают данные и производные"""
+        expected = self.snapshot()
+        output = self.path('archive.jsonl')
+        call_command('export_posts', output, stderr=StringIO())
+        self.wipe()
+        call_command('import_posts', output, '--batch-size=3',
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        author = User.objects.get(username=self.AUTHOR)
+        self.assertEqual(UserStats.objects.get(user=author).posts_count, 5)
+        self.assertEqual(FeedEntry.objects.count(), 5)
+        self.assertEqual(search_posts('Архивный').count(), 5)
+        self.assertEqual(Post.objects.create(text='Новый', author=author).pk,
+                         max(pk for pk, *_ in expected[0]) + 1)
+
+    def test_csv_round_trip(self):
+        """CSV выгружается и загружается по одному типу записей"""
+        expected = self.snapshot()
+        for kind in ('post', 'comment', 'follow'):
+            call_command('export_posts', self.path(f'{kind}.csv'),
+                         f'--kind={kind}', stderr=StringIO())
+        self.wipe()
+        for kind in ('post', 'comment', 'follow'):
+            call_command('import_posts', self.path(f'{kind}.csv'),
+                         f'--kind={kind}', stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_resume_from_checkpoint(self):
+        """Загрузка продолжается с контрольной точки, повтор не дублирует"""
+        output = self.path('resume.jsonl')
+        checkpoint = self.path('resume.checkpoint')
+        call_command('export_posts', output, '--kind=post',
+                     stderr=StringIO())
+        self.wipe()
+        with open(checkpoint, 'w') as state:
+            json.dump({'line': 3}, state)
+        call_command('import_posts', output, f'--checkpoint={checkpoint}',
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        os.remove(checkpoint)
+        call_command('import_posts', output, f'--checkpoint={checkpoint}',
+                     stdout=StringIO())
+        call_command('import_posts', output, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_export_resume(self):
+        """Выгрузка с контрольной точкой дописывает только новые записи"""
+        output = self.path('export.jsonl')
+        checkpoint = self.path('export.checkpoint')
+        call_command('export_posts', output, '--kind=post',
+                     f'--checkpoint={checkpoint}', stderr=StringIO())
+        Post.objects.create(text='Свежий', author=User.objects.first())
+        call_command('export_posts', output, '--kind=post',
+                     f'--checkpoint={checkpoint}', stderr=StringIO())
+        with open(output, encoding='utf-8') as lines:
+            self.assertEqual(len(lines.readlines()), 6)
+
+    def test_export_resume_drops_unsaved_tail(self):
+        """Строки после контрольной точки при продолжении не дублируются"""
+        output = self.path('tail.jsonl')
+        checkpoint = self.path('tail.checkpoint')
+        call_command('export_posts', output, '--kind=post',
+                     '--chunk-size=2', f'--checkpoint={checkpoint}',
+                     stderr=StringIO())
+        with open(checkpoint) as state:
+            saved = json.load(state)
+        # Обрыв после записи страницы, но до контрольной точки.
+        saved['post'] = Post.objects.order_by('pk')[1].pk
+        with open(output, encoding='utf-8') as lines:
+            saved['offset'] = len(''.join(lines.readlines()[:2]).encode())
+        with open(checkpoint, 'w') as state:
+            json.dump(saved, state)
+        call_command('export_posts', output, '--kind=post',
+                     f'--checkpoint={checkpoint}', stderr=StringIO())
+        with open(output, encoding='utf-8') as lines:
+            ids = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('pk').values_list(
+                'pk', flat=True)))
+
+    def test_conflicting_pk_rejected(self):
+        """Занятый другим постом pk останавливает загрузку"""
+        output = self.path('conflict.jsonl')
+        call_command('export_posts', output, '--kind=post',
+                     stderr=StringIO())
+        Post.objects.filter(pk=Post.objects.first().pk).update(text='Другой')
+        with self.assertRaises(CommandError):
+            call_command('import_posts', output, stdout=StringIO())
+
+    def test_reimport_skips_same_rows(self):
+        """Повторная загрузка тех же записей в ту же базу ничего не меняет"""
+        expected = self.snapshot()
+        output = self.path('same.jsonl')
+        call_command('export_posts', output, stderr=StringIO())
+        call_command('import_posts', output, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_rebuild_scoped_to_batch(self):
+        """Производные пересобираются по пачкам и только для их записей"""
+        other = User.objects.create_user(username='other')
+        post = Post.objects.create(text='Чужой', author=other)
+        with mock.patch('posts.transfer.reconcile') as reconcile:
+            rebuild_touched(Touched([('post', {'id': post.pk,
+                                               'author': 'other'})]))
+        reconcile.assert_called_once_with([other.pk])
+        output = self.path('batches.jsonl')
+        call_command('export_posts', output, stderr=StringIO())
+        self.wipe()
+        with mock.patch(
+                'posts.management.commands.import_posts.rebuild_touched',
+                wraps=rebuild_touched) as rebuild:
+            call_command('import_posts', output, '--batch-size=4',
+                         stdout=StringIO())
+        # 5 постов, 5 комментариев и подписка — три пачки.
+        self.assertEqual(rebuild.call_count, 3)
+
+    def test_trending_only_for_recent_comments(self):
+        """«Обсуждаемое» пересчитывается, только если пришли свежие
+        комментарии, в том числе загруженные до контрольной точки"""
+        with mock.patch('posts.transfer.trending.rebuild') as rebuild:
+            finish_import(None)
+            rebuild.assert_not_called()
+        output = self.path('trending.jsonl')
+        checkpoint = self.path('trending.checkpoint')
+        call_command('export_posts', output, stderr=StringIO())
+        self.wipe()
+        call_command('import_posts', output, '--no-finish',
+                     f'--checkpoint={checkpoint}', stdout=StringIO())
+        # Всё уже загружено, о свежих комментариях помнит только
+        # контрольная точка.
+        with mock.patch('posts.transfer.trending.rebuild') as rebuild:
+            call_command('import_posts', output,
+                         f'--checkpoint={checkpoint}', stdout=StringIO())
+        rebuild.assert_called_once_with()
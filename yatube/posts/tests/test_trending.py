@@ -0,0 +1,116 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.config import POSTS_PER_PAGE, TRENDING_HALF_LIFE
+from posts.models import Comment, Post, PostScore, User
+from posts.trending import rebuild, record_comment
+
+
+class TrendingTests(TestCase):
+    """Тестирует рейтинг обсуждаемых постов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.posts = [Post.objects.create(text=f'Пост {i}', author=cls.author)
+                     for i in range(3)]
+        cls.URL = reverse('posts:trending')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def comment(self, post, created=None):
+        comment = Comment.objects.create(post=post, author=self.author,
+                                         text='Комментарий')
+        if created is not None:
+            Comment.objects.filter(pk=comment.pk).update(created=created)
+        return comment
+
+    def ranking(self):
+        return [post.pk for post in self.client.get(
+            self.URL).context['page_obj']]
+
+    def test_comment_updates_score(self):
+        """Каждый комментарий поднимает пост в рейтинге"""
+        first, second, _ = self.posts
+        self.comment(first)
+        self.assertEqual(self.ranking(), [first.pk])
+        self.comment(second)
+        self.comment(second)
+        self.assertEqual(self.ranking(), [second.pk, first.pk])
+
+    def test_score_matches_rebuild(self):
+        """Накопленный вес совпадает с пересчитанным заново"""
+        post = self.posts[0]
+        now = timezone.now()
+        for hours in (0, 3, 12):
+            record_comment(post.pk, now - timedelta(hours=hours))
+            Comment.objects.bulk_create([Comment(
+                post=post, author=self.author, text='Комментарий',
+                created=now - timedelta(hours=hours))])
+        incremental = PostScore.objects.get(post=post).score
+        rebuild(now)
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=post).score, incremental, places=6)
+
+    def test_old_comments_decay(self):
+        """Свежий комментарий весит больше многих старых"""
+        old, fresh, _ = self.posts
+        long_ago = timezone.now() - timedelta(
+            seconds=TRENDING_HALF_LIFE * 5)
+        for _ in range(10):
+            self.comment(old, created=long_ago)
+        rebuild()
+        self.comment(fresh)
+        self.assertEqual(self.ranking(), [fresh.pk, old.pk])
+
+    def test_rebuild_drops_stale_posts(self):
+        """Пересчёт убирает посты без комментариев в окне"""
+        stale, active, _ = self.posts
+        self.comment(stale, created=timezone.now() - timedelta(days=30))
+        self.comment(active)
+        rebuild()
+        self.assertEqual(self.ranking(), [active.pk])
+
+    def test_cursor_pagination(self):
+        """Вкладка листается курсором без повторов"""
+        posts = [Post.objects.create(text='Пост', author=self.author)
+                 for _ in range(POSTS_PER_PAGE + 2)]
+        for post in posts:
+            self.comment(post)
+        page = self.client.get(self.URL).context['page_obj']
+        rest = self.client.get(
+            self.URL + '?after=' + page.next_cursor).context['page_obj']
+        seen = [post.pk for post in page] + [post.pk for post in rest]
+        self.assertEqual(len(page), POSTS_PER_PAGE)
+        self.assertCountEqual(seen, [post.pk for post in posts])
+
+    def test_comment_and_score_commit_together(self):
+        """Комментарий не сохраняется без своего веса в рейтинге"""
+        post = self.posts[0]
+        self.client.force_login(self.author)
+        with mock.patch('posts.trending.record_comment',
+                        side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            self.client.post(
+                reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+                {'text': 'Комментарий'})
+        self.assertFalse(Comment.objects.filter(post=post).exists())
+
+    def test_rebuild_replaces_scores_atomically(self):
+        """Ошибка пересчёта оставляет прежний рейтинг"""
+        post = self.posts[0]
+        self.comment(post)
+        with mock.patch('posts.trending.heapq.nlargest',
+                        side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            rebuild()
+        self.assertTrue(PostScore.objects.filter(post=post).exists())
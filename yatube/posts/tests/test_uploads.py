@@ -0,0 +1,116 @@
+import io
+import shutil
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(size, exif=True, orientation=None):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, 'red')
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = 'Camera'
+        if orientation is not None:
+            metadata[0x0112] = orientation
+        image.save(buffer, 'JPEG', exif=metadata)
+    else:
+        image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.workers.WORKER_PROCESSES', 0)
+class UploadIngestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.POST_CREATE_URL = reverse('posts:post_create')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def upload(self, name, content):
+        return self.author_client.post(self.POST_CREATE_URL, {
+            'text': 'Тестовый текст',
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def test_large_image_downscaled_and_stripped(self):
+        """Большая картинка уменьшается и теряет метаданные"""
+        with mock.patch('posts.uploads.MAX_IMAGE_SIDE', 100):
+            response = self.upload('photo.jpeg', make_jpeg((400, 200)))
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertFalse(image.getexif())
+        self.assertTrue(post.image.name.endswith('.jpg'))
+
+    def test_upload_size_cap(self):
+        """Файл сверх лимита отклоняется формой"""
+        with mock.patch('posts.uploads.MAX_UPLOAD_SIZE', 100):
+            response = self.upload('photo.jpg', make_jpeg((64, 64)))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('image'))
+        self.assertFalse(Post.objects.exists())
+
+    def test_rejects_by_header(self):
+        """Не-картинка отклоняется по сигнатуре, без Pillow"""
+        with mock.patch('posts.uploads.Image.open') as image_open:
+            response = self.upload('photo.png', b'<?php echo 1; ?>')
+        image_open.assert_not_called()
+        self.assertTrue(response.context['form'].has_error(
+            'image', 'invalid_image'))
+
+    def test_rejects_pixel_bomb(self):
+        """Картинка со слишком большим разрешением отклоняется"""
+        with mock.patch('posts.uploads.MAX_IMAGE_PIXELS', 100):
+            response = self.upload('photo.jpg', make_jpeg((64, 64), False))
+        self.assertTrue(response.context['form'].has_error(
+            'image', 'invalid_image'))
+
+    def test_exif_orientation_applied(self):
+        """Поворот из EXIF применяется до удаления метаданных"""
+        response = self.upload('photo.jpg', make_jpeg((40, 20),
+                                                      orientation=6))
+        self.assertEqual(response.status_code, 302)
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
+
+    def test_rejects_truncated_image(self):
+        """Обрезанный файл отклоняется формой, а не ответом 500"""
+        content = make_jpeg((400, 200), False)
+        response = self.upload('photo.jpg', content[:len(content) // 2])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error(
+            'image', 'invalid_image'))
+        self.assertFalse(Post.objects.exists())
+
+    def test_worker_failure(self):
+        """Сбой пула процессов показывается ошибкой формы"""
+        with mock.patch('posts.uploads.workers.submit',
+                        side_effect=BrokenProcessPool()):
+            response = self.upload('photo.jpg', make_jpeg((64, 64)))
+        self.assertTrue(response.context['form'].has_error(
+            'image', 'image_processing_failed'))
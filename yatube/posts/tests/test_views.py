@@ -2,7 +2,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from posts.models import Post, User, Group, Follow
+from posts.config import COMMENTS_PER_PAGE
+from posts.models import Comment, Post, User, Group, Follow
 
 
 class TaskPagesTests(TestCase):
@@ -114,3 +115,19 @@ class TaskPagesTests(TestCase):
             with self.subTest(url=url):
                 response = self.author.get(url)
                 self.assertNotIn(self.post, response.context['page_obj'])
+
+    def test_post_detail_comments_paginated(self):
+        """Комментарии на странице поста выводятся порциями по курсору"""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.follower_user,
+                    text=self.OTHER_TEXT)
+            for _ in range(COMMENTS_PER_PAGE + 2)
+        )
+        expected = list(self.post.comments.order_by('-created', '-pk'))
+        first = self.author.get(self.POST_DETAIL_URL).context['comments']
+        self.assertEqual(list(first), expected[:COMMENTS_PER_PAGE])
+        second = self.author.get(
+            self.POST_DETAIL_URL, {'after': first.next_cursor}
+        ).context['comments']
+        self.assertEqual(list(second), expected[COMMENTS_PER_PAGE:])
+        self.assertFalse(second.has_next())
@@ -0,0 +1,36 @@
+import logging
+
+from django.db import transaction
+from sorl.thumbnail import get_thumbnail
+
+from .config import THUMBNAIL_GEOMETRIES
+from . import workers
+
+logger = logging.getLogger(__name__)
+
+
+def generate(name):
+    """Создаёт все миниатюры картинки и кладёт их в KV-хранилище sorl."""
+    for geometry, options in THUMBNAIL_GEOMETRIES:
+        get_thumbnail(name, geometry, **options)
+    return name
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error('Не удалось создать миниатюры',
+                     exc_info=future.exception())
+
+
+def _submit(name):
+    # Выполняется после коммита: исключение отсюда превратило бы уже
+    # сохранённый пост в ответ 500.
+    try:
+        workers.submit(generate, name).add_done_callback(_log_failure)
+    except Exception:
+        logger.exception('Не удалось поставить миниатюры в очередь')
+
+
+def schedule(name):
+    """Ставит генерацию миниатюр в пул после коммита транзакции."""
+    transaction.on_commit(lambda: _submit(name))
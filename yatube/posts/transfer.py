@@ -0,0 +1,237 @@
+import json
+import os
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.routers import pin_primary
+
+from . import caching, feed, trending
+from .config import FEED_BATCH_SIZE, TRENDING_WINDOW
+from .counters import reconcile
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend
+
+# Порядок важен: комментарии и подписки ссылаются на уже загруженное.
+KINDS = ('post', 'comment', 'follow')
+FIELDS = {
+    'post': ('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('id', 'user', 'author'),
+}
+COLUMNS = {
+    'post': ('pk', 'text', 'pub_date', 'author__username', 'group__slug',
+             'image'),
+    'comment': ('pk', 'post_id', 'author__username', 'text', 'created'),
+    'follow': ('pk', 'user__username', 'author__username'),
+}
+MODELS = {'post': Post, 'comment': Comment, 'follow': Follow}
+# По этим полям запись с занятым pk узнаётся как уже загруженная.
+SIGNATURES = {
+    'post': ('author_id', 'pub_date', 'text'),
+    'comment': ('post_id', 'author_id', 'created', 'text'),
+    'follow': ('user_id', 'author_id'),
+}
+
+
+class ImportConflict(Exception):
+    """pk из архива занят в базе другой записью."""
+
+
+def _record(kind, values):
+    record = dict(zip(FIELDS[kind], values))
+    for field in ('pub_date', 'created'):
+        if field in record:
+            record[field] = record[field].isoformat()
+    if kind == 'post':
+        record['group'] = record['group'] or ''
+    return record
+
+
+def export_pages(kind, after=0, page_size=2000):
+    """Страницы записей по возрастанию pk, начиная после after.
+
+    Каждая страница — отдельный запрос pk > последнего выгруженного:
+    память не зависит от размера таблицы, и выгрузку можно продолжить
+    ровно с границы страницы.
+    """
+    rows = MODELS[kind].objects.order_by('pk').values_list(*COLUMNS[kind])
+    while True:
+        page = list(rows.filter(pk__gt=after)[:page_size])
+        if not page:
+            return
+        yield [_record(kind, values) for values in page]
+        after = page[-1][0]
+
+
+def _users(usernames):
+    """pk пользователей по именам; недостающие создаются без пароля."""
+    usernames = set(usernames)
+    existing = dict(User.objects.filter(
+        username__in=usernames).values_list('username', 'pk'))
+    missing = usernames - existing.keys()
+    if missing:
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=name, password=password) for name in missing],
+            ignore_conflicts=True)
+        existing.update(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+    return existing
+
+
+def _groups(slugs):
+    slugs = {slug for slug in slugs if slug}
+    existing = dict(Group.objects.filter(
+        slug__in=slugs).values_list('slug', 'pk'))
+    missing = slugs - existing.keys()
+    if missing:
+        Group.objects.bulk_create(
+            [Group(slug=slug, title=slug, description='')
+             for slug in missing],
+            ignore_conflicts=True)
+        existing.update(Group.objects.filter(
+            slug__in=missing).values_list('slug', 'pk'))
+    return existing
+
+
+def _build(kind, records):
+    if kind == 'post':
+        users = _users(record['author'] for record in records)
+        groups = _groups(record['group'] for record in records)
+        return [Post(
+            pk=int(record['id']),
+            text=record['text'],
+            pub_date=parse_datetime(record['pub_date']),
+            author_id=users[record['author']],
+            group_id=groups.get(record['group']),
+            image=record.get('image') or '',
+        ) for record in records]
+    if kind == 'comment':
+        users = _users(record['author'] for record in records)
+        return [Comment(
+            pk=int(record['id']),
+            post_id=int(record['post']),
+            author_id=users[record['author']],
+            text=record['text'],
+            created=parse_datetime(record['created']),
+        ) for record in records]
+    users = _users(name for record in records
+                   for name in (record['user'], record['author']))
+    return [Follow(
+        pk=int(record['id']),
+        user_id=users[record['user']],
+        author_id=users[record['author']],
+    ) for record in records]
+
+
+def import_records(kind, records):
+    """Вставляет пачку записей одного типа с pk из архива.
+
+    Запись, чей pk уже занят ею же, пропускается, поэтому повторный
+    прогон пачки ничего не дублирует. pk, занятый другой записью, —
+    ImportConflict: иначе пост молча потерялся бы, а его комментарии
+    достались бы чужому посту с тем же pk.
+    """
+    model, fields = MODELS[kind], SIGNATURES[kind]
+    objects = _build(kind, records)
+    existing = {
+        pk: tuple(values) for pk, *values in model.objects.filter(
+            pk__in=[obj.pk for obj in objects]).values_list('pk', *fields)
+    }
+    fresh = []
+    for obj in objects:
+        if obj.pk not in existing:
+            fresh.append(obj)
+        elif existing[obj.pk] != tuple(getattr(obj, f) for f in fields):
+            raise ImportConflict(
+                f'{kind} с id={obj.pk} уже есть в базе и отличается от '
+                f'загружаемого; загружайте архив в пустую базу.')
+    # Совпадающая пара подписки с другим pk — та же подписка.
+    model.objects.bulk_create(fresh, ignore_conflicts=kind == 'follow')
+
+
+class Touched:
+    """Что затронула одна пачка загрузки: пересобирается только это."""
+
+    def __init__(self, batch=()):
+        self.usernames = set()
+        self.post_ids = set()
+        self.follow_ids = set()
+        self.latest_comment = None
+        for kind, record in batch:
+            self.add(kind, record)
+
+    def add(self, kind, record):
+        if kind == 'post':
+            self.usernames.add(record['author'])
+            self.post_ids.add(int(record['id']))
+        elif kind == 'comment':
+            self.usernames.add(record['author'])
+            created = parse_datetime(record['created'])
+            if self.latest_comment is None or created > self.latest_comment:
+                self.latest_comment = created
+        else:
+            self.usernames.update((record['user'], record['author']))
+            self.follow_ids.add(int(record['id']))
+
+
+def _batches(items, size=FEED_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def rebuild_touched(touched):
+    """Пересобирает то, что bulk_create обходит, для одной пачки.
+
+    Счётчики её пользователей, ленты по её постам и подпискам и поиск по
+    её постам. Вызывается в транзакции пачки: пачка и её производные
+    фиксируются вместе, память и длина транзакции не зависят от размера
+    архива.
+    """
+    # Раскладка по лентам смотрит на followers_count, он нужен свежим.
+    for usernames in _batches(touched.usernames):
+        reconcile(list(User.objects.filter(
+            username__in=usernames).values_list('pk', flat=True)))
+    feed.refill_posts(touched.post_ids)
+    feed.refill_follows(touched.follow_ids)
+    get_backend().index_many(touched.post_ids)
+
+
+def finish_import(latest_comment=None):
+    """Завершает загрузку: сдвигает последовательности pk за загруженные
+    и, если пришли комментарии из окна «Обсуждаемого», пересчитывает его.
+
+    По основной базе: чтение отстающей реплики дало бы неверный рейтинг.
+    """
+    with pin_primary(), transaction.atomic():
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), list(MODELS.values())):
+                cursor.execute(sql)
+        cutoff = timezone.now() - timedelta(seconds=TRENDING_WINDOW)
+        if latest_comment and latest_comment >= cutoff:
+            trending.rebuild()
+    caching.bump_generation()
+
+
+def read_checkpoint(path, default):
+    if not path or not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as checkpoint:
+        return json.load(checkpoint)
+
+
+def write_checkpoint(path, state):
+    """Атомарно заменяет файл контрольной точки."""
+    if not path:
+        return
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(temporary, path)
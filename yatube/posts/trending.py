@@ -0,0 +1,87 @@
+import heapq
+import math
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from . import caching
+from .config import (FEED_BATCH_SIZE, TRENDING_HALF_LIFE, TRENDING_SIZE,
+                     TRENDING_WINDOW)
+from .models import Comment, PostScore
+
+# Прямое затухание: вес считается от неподвижной точки, а не от «сейчас».
+LANDMARK = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DECAY_RATE = math.log(2) / TRENDING_HALF_LIFE
+
+
+def weight(created):
+    """Логарифм веса комментария, оставленного в момент created."""
+    return DECAY_RATE * (created - LANDMARK).total_seconds()
+
+
+def log_add(first, second):
+    """ln(e^first + e^second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def record_comment(post_id, created):
+    """Добавляет вес нового комментария к весу поста одним UPDATE."""
+    value = Value(weight(created), output_field=FloatField())
+    updated = PostScore.objects.filter(post_id=post_id).update(
+        score=Greatest(F('score'), value)
+        + Ln(1 + Exp(-Abs(F('score') - value))))
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            PostScore.objects.create(post_id=post_id, score=value.value)
+    except IntegrityError:
+        record_comment(post_id, created)
+
+
+def _lock_scores():
+    """Очищает таблицу рейтинга, не пуская в неё record_comment до конца
+    транзакции.
+
+    Иначе вес комментария, записанный между чтением комментариев и
+    заменой таблицы, пропал бы, а новая строка record_comment
+    столкнулась бы со вставкой rebuild.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'LOCK TABLE {PostScore._meta.db_table} IN EXCLUSIVE MODE')
+    # На SQLite первая запись берёт блокировку всей базы.
+    PostScore.objects.all().delete()
+
+
+def rebuild(now=None):
+    """Пересчитывает рейтинг по комментариям последних TRENDING_WINDOW
+    секунд.
+
+    Посты, чей вес затух за пределами окна, и удалённые комментарии
+    уходят из таблицы; остаются TRENDING_SIZE лучших.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=TRENDING_WINDOW)
+    with transaction.atomic():
+        _lock_scores()
+        scores = {}
+        comments = Comment.objects.filter(
+            created__gte=cutoff).order_by().values_list('post_id', 'created')
+        for post_id, created in comments.iterator():
+            score = weight(created)
+            if post_id in scores:
+                score = log_add(scores[post_id], score)
+            scores[post_id] = score
+        best = heapq.nlargest(TRENDING_SIZE, scores.items(),
+                              key=lambda item: item[1])
+        PostScore.objects.bulk_create(
+            [PostScore(post_id=post_id, score=score)
+             for post_id, score in best],
+            batch_size=FEED_BATCH_SIZE)
+    caching.bump_generation()
+    return len(best)
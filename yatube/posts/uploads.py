@@ -0,0 +1,152 @@
+import os
+import shutil
+import weakref
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+from . import workers
+from .config import (INGEST_TIMEOUT, MAX_IMAGE_PIXELS, MAX_IMAGE_SIDE,
+                     MAX_UPLOAD_SIZE)
+
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку сразу на диск и перестаёт писать после лимита.
+
+    Файл сверх MAX_UPLOAD_SIZE помечается, а не обрывает весь запрос,
+    чтобы форма могла показать понятную ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.too_large = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            self.too_large = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.too_large = self.too_large
+        return file
+
+
+def sniff_format(file):
+    """Формат картинки по сигнатуре в первых байтах, без декодирования."""
+    file.seek(0)
+    header = file.read(12)
+    file.seek(0)
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def normalize(source_path, target_path, image_format):
+    """Уменьшает картинку и пересохраняет без метаданных.
+
+    Поворот из EXIF применяется до удаления метаданных, иначе снимки
+    с телефона сохранялись бы лёжа. Выполняется в пуле процессов:
+    декодирование — самая тяжёлая часть.
+    """
+    with Image.open(source_path) as original:
+        if image_format == 'JPEG':
+            original.draft('RGB', (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        options = {'optimize': True}
+        if image_format == 'JPEG':
+            options['quality'] = 90
+        image.save(target_path, image_format, **options)
+    return os.path.getsize(target_path)
+
+
+def _close_quietly(file):
+    # Хранилище переносит временный файл в MEDIA_ROOT, удалять уже нечего.
+    try:
+        file.close()
+    except FileNotFoundError:
+        pass
+
+
+def _local_path(file):
+    if hasattr(file, 'temporary_file_path'):
+        return file.temporary_file_path(), None
+    copy = TemporaryUploadedFile(file.name, file.content_type, 0, None)
+    file.seek(0)
+    shutil.copyfileobj(file, copy.file)
+    copy.flush()
+    return copy.temporary_file_path(), copy
+
+
+def _normalized(path, name, image_format):
+    """Нормализованная копия картинки во временном файле."""
+    name = (f'{os.path.splitext(os.path.basename(name))[0]}.'
+            f'{EXTENSIONS[image_format]}')
+    result = TemporaryUploadedFile(
+        name, Image.MIME[image_format], 0, None,
+    )
+    weakref.finalize(result, _close_quietly, result.file)
+    try:
+        result.size = workers.submit(
+            normalize, path, result.temporary_file_path(), image_format
+        ).result(timeout=INGEST_TIMEOUT)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Файл повреждён или не является '
+                              'картинкой.', code='invalid_image')
+    except (TimeoutError, BrokenProcessPool):
+        raise ValidationError('Не удалось обработать картинку, '
+                              'попробуйте ещё раз.',
+                              code='image_processing_failed')
+    result.seek(0)
+    return result
+
+
+def ingest_image(file):
+    """Проверяет загруженную картинку и при необходимости нормализует её."""
+    if getattr(file, 'too_large', False) or file.size > MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            f'Картинка больше {MAX_UPLOAD_SIZE // (1024 * 1024)} МБ.',
+            code='file_too_large')
+    image_format = sniff_format(file)
+    if image_format is None:
+        raise ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WEBP.',
+            code='invalid_image')
+    path, copy = _local_path(file)
+    try:
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError('Файл повреждён или не является '
+                                  'картинкой.', code='invalid_image')
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValidationError('Слишком большое разрешение картинки.',
+                                  code='invalid_image')
+        if (image_format == 'GIF'
+                and max(width, height) <= MAX_IMAGE_SIDE):
+            file.seek(0)
+            return file
+        return _normalized(path, file.name, image_format)
+    finally:
+        if copy is not None:
+            copy.close()
@@ -1,31 +1,83 @@
 ﻿from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition
 
-from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow, Comment
-from .config import POSTS_PER_PAGE
-
-
-def pagination(request, posts):
-    return Paginator(posts, POSTS_PER_PAGE).get_page(request.GET.get('page'))
-
+from core.throttling import throttle
 
+from .caching import anonymous_cache, fragment_cache_context, page_etag
+from .forms import PostForm, CommentForm
+from .models import AuthorRecommendation, Post, Group, User, Follow, Comment
+from .config import (COMMENTS_PER_PAGE, POSTS_PER_PAGE,
+                     RECOMMENDATIONS_SHOWN)
+from .counters import get_stats
+from .feed import feed_sources
+from .paginators import CursorPaginator, keyset
+from .search import search_posts
+
+
+def pagination(request, posts, sources=None, fallback=None):
+    """Курсорная пагинация; ?page= оставлен для старых ссылок."""
+    if 'page' in request.GET:
+        return Paginator(posts, POSTS_PER_PAGE).get_page(
+            request.GET.get('page'))
+    return CursorPaginator(
+        sources or keyset(posts), POSTS_PER_PAGE, fallback=fallback
+    ).get_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+def suggestions(user):
+    """Авторы из таблицы рекомендаций, на которых пользователь ещё не
+    подписан; пустой список для гостей."""
+    if not user.is_authenticated:
+        return []
+    return AuthorRecommendation.objects.filter(user=user).exclude(
+        author__following__user=user).select_related('author').order_by(
+        '-score')[:RECOMMENDATIONS_SHOWN]
+
+
+@condition(etag_func=page_etag)
+@anonymous_cache
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_listing()
     return render(request, 'posts/index.html', {
-        'page_obj': pagination(request, posts)})
+        'page_obj': pagination(request, posts),
+        **fragment_cache_context(),
+    })
+
 
+@condition(etag_func=page_etag)
+@anonymous_cache
+def trending(request):
+    posts = Post.objects.for_listing().filter(score__isnull=False)
+    return render(request, 'posts/trending.html', {
+        'page_obj': CursorPaginator(
+            keyset(posts, value='score__score', pk='score__post'),
+            POSTS_PER_PAGE
+        ).get_page(after=request.GET.get('after'),
+                   before=request.GET.get('before')),
+        **fragment_cache_context(),
+    })
 
+
+@condition(etag_func=page_etag)
+@anonymous_cache
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': pagination(request, group.posts.all()),
+        'page_obj': pagination(request, group.posts.for_listing()),
+        **fragment_cache_context(),
     })
 
 
+@condition(etag_func=page_etag)
+@anonymous_cache
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     following = (request.user.is_authenticated and request.user != author
@@ -33,21 +85,80 @@ def profile(request, username):
                                            author=author).exists())
     return render(request, 'posts/profile.html', {
         'author': author,
-        'page_obj': pagination(request, author.posts.all()),
-        'following': following
+        'stats': get_stats(author),
+        'page_obj': pagination(
+            request, author.posts.for_listing(),
+            fallback=keyset(author.archived_posts.for_listing())),
+        'following': following,
+        'suggestions': suggestions(request.user),
+        **fragment_cache_context(),
     })
 
 
+@condition(etag_func=page_etag)
+@anonymous_cache
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    try:
+        post = Post.objects.select_related(
+            'author', 'group').get_or_archived(pk=post_id)
+    except Post.DoesNotExist:
+        raise Http404
     form = CommentForm()
+    comments = keyset(
+        post.comments.select_related('author').only(
+            'text', 'created', 'post_id', 'author__username',
+            'author__first_name', 'author__last_name'),
+        'created',
+    )
     context = {
         'post': post,
+        'author_stats': get_stats(post.author),
+        'comments': CursorPaginator(comments, COMMENTS_PER_PAGE).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before')),
         'form': form}
     return render(request, 'posts/post_detail.html', context)
 
 
+def search_page(request):
+    query = request.GET.get('q', '').strip()
+    return query, CursorPaginator(
+        search_posts(query), POSTS_PER_PAGE
+    ).get_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+def search(request):
+    query, page_obj = search_page(request)
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+    })
+
+
+def search_api(request):
+    query, page_obj = search_page(request)
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'id': post.pk,
+                'text': post.text,
+                'author': post.author.username,
+                'group': post.group.slug if post.group else None,
+                'pub_date': post.pub_date,
+                'rank': post.cursor_value,
+                'url': reverse('posts:post_detail', args=[post.pk]),
+            }
+            for post in page_obj
+        ],
+        'next': page_obj.next_cursor,
+        'previous': page_obj.previous_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
 @login_required
+@throttle('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -84,13 +195,17 @@ def post_delete(request, post_id):
 
 
 @login_required
+@throttle('add_comment')
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = get_object_or_404(Post, pk=post_id)
-        comment.save()
+        # Комментарий и вес в «Обсуждаемом» фиксируются вместе, иначе
+        # trending.rebuild между ними учёл бы комментарий дважды.
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -103,14 +218,20 @@ def comment_delete(request, comment_id):
 
 
 @login_required
+@condition(etag_func=page_etag)
 def follow_index(request):
     return render(request, 'posts/follow.html', {
         'page_obj': pagination(
             request,
-            Post.objects.filter(author__following__user=request.user))})
+            Post.objects.for_listing().filter(
+                author__following__user=request.user),
+            sources=feed_sources(request.user)),
+        'suggestions': suggestions(request.user),
+    })
 
 
 @login_required
+@throttle('profile_follow', methods=None)
 def profile_follow(request, username):
     if username != request.user.username:
         author = get_object_or_404(User, username=username)
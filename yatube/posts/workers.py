@@ -0,0 +1,62 @@
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+
+from .config import WORKER_PROCESSES
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def get_pool():
+    """Общий ограниченный пул процессов, создаётся при первом вызове.
+
+    Процессы запускаются через spawn и поднимают Django заново, чтобы
+    не делить с родителем сокеты соединений с базой.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=WORKER_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def submit(func, *args):
+    """Запускает func в пуле; при WORKER_PROCESSES = 0 — на месте."""
+    if not WORKER_PROCESSES:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+    try:
+        return get_pool().submit(func, *args)
+    except BrokenProcessPool:
+        # Упавший процесс ломает пул навсегда: заменяем его новым.
+        _replace_broken_pool()
+        return get_pool().submit(func, *args)
+
+
+def _replace_broken_pool():
+    global _pool
+    logger.warning('Пул процессов сломан, создаётся новый')
+    broken, _pool = _pool, None
+    if broken is not None:
+        broken.shutdown(wait=False)
@@ -0,0 +1,38 @@
+import copy
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_KEY = 'users:user:{}'
+# Пользователь сбрасывается сигналами, срок нужен только на случай
+# изменений в обход save(), например через QuerySet.update().
+USER_CACHE_TIMEOUT = 60 * 60
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def remember_user(user):
+    """Кладёт в кэш копию пользователя без закэшированных прав."""
+    user = copy.copy(user)
+    for attr in ('_perm_cache', '_user_perm_cache', '_group_perm_cache'):
+        user.__dict__.pop(attr, None)
+    cache.set(user_key(user.pk), user, USER_CACHE_TIMEOUT)
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который загружает пользователя сессии из кэша."""
+
+    def get_user(self, user_id):
+        user = cache.get(user_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                remember_user(user)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import forget_user, remember_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def user_logged_in_cache(sender, request, user, **kwargs):
+    remember_user(user)
+
+
+@receiver(user_logged_out)
+def user_logged_out_cache(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
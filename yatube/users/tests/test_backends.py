@@ -0,0 +1,75 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+from users.backends import user_key
+
+
+class CachedAuthTests(TestCase):
+    """Тестирует загрузку сессии и пользователя из кэша"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.USERNAME = 'auth'
+        cls.PASSWORD = 'Secret-pass-42'
+        cls.INDEX_URL = reverse('posts:index')
+        cls.user = User.objects.create_user(username=cls.USERNAME,
+                                            password=cls.PASSWORD)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username=self.USERNAME, password=self.PASSWORD)
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.INDEX_URL)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if ('django_session' in query['sql']
+                or 'auth_user' in query['sql'])
+            and 'posts_post' not in query['sql']
+        ]
+
+    def test_session_and_user_from_cache(self):
+        """После входа сессия и пользователь не читаются из базы"""
+        response, queries = self.auth_queries()
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(queries, [])
+
+    def test_user_change_invalidates(self):
+        """Изменение пользователя сбрасывает его запись в кэше"""
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        self.assertIsNone(cache.get(user_key(user.pk)))
+        response, queries = self.auth_queries()
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_logs_out(self):
+        """Смена пароля завершает сессии со старым паролем"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('Another-pass-42')
+        user.save()
+        response, _ = self.auth_queries()
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_forgets_user(self):
+        """Выход убирает пользователя из кэша"""
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+
+    def test_old_sessions_survive(self):
+        """Сессия, открытая через ModelBackend, остаётся в силе"""
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = (
+            'django.contrib.auth.backends.ModelBackend')
+        session.save()
+        response = self.client.get(self.INDEX_URL)
+        self.assertEqual(response.context['user'], self.user)
@@ -3,12 +3,18 @@ from django.contrib.auth.views import (LoginView,
                                        PasswordResetView,
                                        PasswordChangeView)
 from django.urls import path
+
+from core.throttling import throttle
 from . import views
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path(
+        'signup/',
+        throttle('signup', by='ip')(views.SignUp.as_view()),
+        name='signup'
+    ),
     path(
         'logout/',
         LogoutView.as_view(template_name='users/logged_out.html'),
@@ -16,7 +22,8 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        throttle('login', by='ip')(
+            LoginView.as_view(template_name='users/login.html')),
         name='login'
     ),
     path(
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -32,14 +33,60 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+# L1 в памяти каждого процесса поверх общего для всех процессов L2.
+# На нескольких серверах 'shared' переводится на общий бэкенд с
+# атомарными add и incr, например memcached.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.cache.LockingFileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Метрики запросов (core.metrics): процессы сбрасывают снимки в METRICS_DIR
+# не чаще раза в METRICS_FLUSH_INTERVAL секунд, /metrics их суммирует.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+METRICS_FLUSH_INTERVAL = 10
+# Адреса ниже сверяются с адресом клиента за THROTTLE_PROXY_HOPS прокси,
+# а не с REMOTE_ADDR, который за прокси у всех один.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+# Заголовок Server-Timing видят только эти адреса и сотрудники.
+INTERNAL_IPS = ['127.0.0.1']
+
+# При DEBUG запрос одной формы чаще стольких раз за ответ попадает в лог
+# yatube.queries (core.queryshapes); 0 отключает проверку.
+QUERY_SHAPE_LIMIT = 3
+# sorl-thumbnail ищет каждую миниатюру в своём KV-хранилище отдельно, но
+# только на холодном кэше: дальше ответы приходят из кэша.
+QUERY_SHAPE_IGNORE = ('thumbnail_kvstore',)
+
+# Ограничения частоты записи (core.throttling): область -> (запросов, за
+# сколько секунд). Вёдра лежат в общем кэше, чтобы их видели все процессы.
+# THROTTLE_PROXY_HOPS — сколько обратных прокси перед приложением
+# дописывают X-Forwarded-For; по адресу клиента считаются вёдра гостей.
+THROTTLE_CACHE = 'shared'
+THROTTLE_PROXY_HOPS = 1
+THROTTLE_RATES = {
+    'post_create': (20, 60 * 60),
+    'add_comment': (10, 60),
+    'profile_follow': (30, 60),
+    'signup': (5, 60 * 60),
+    'login': (10, 60 * 5),
+}
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -56,7 +103,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'core.middleware.QueryShapeMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,11 +115,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Сессия и пользователь сессии читаются из кэша, запись идёт и в базу.
+# ModelBackend остаётся в списке для сессий, открытых до кэширования:
+# auth.get_user завершает сессию, чей бэкенд из списка пропал.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -101,6 +160,14 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения — алиасы из DATABASES, например
+# DATABASES['replica'] = {..., 'TEST': {'MIRROR': 'default'}}.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Столько секунд после своей записи посетитель читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -145,6 +212,16 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+# collectstatic хэширует имена и пишет рядом .gz/.br копии; отдаёт их
+# core.wsgi_static.PrecompressedStatic из yatube/wsgi.py.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+# Для файлов без хэша в имени, секунды.
+STATIC_MAX_AGE = 60
+
+# Загрузки сразу пишутся во временные файлы, с лимитом размера.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedTemporaryFileUploadHandler']
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'